@@ -1,3 +1,4 @@
+from .async_drone import AsyncDrone
 from .constants import WaterDensities
 from .drone import Drone
 from .utils import open_local_documentation
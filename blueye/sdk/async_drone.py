@@ -0,0 +1,555 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import blueye.protocol
+import proto
+import zmq
+import zmq.asyncio
+from packaging import version
+
+from .connection import ReqRepClient
+from .utils import message_type_from_topic, request_drone_info
+
+logger = logging.getLogger(__name__)
+
+# Put on the queue of a subscription when it is closed, to wake up a waiting consumer
+_SUBSCRIPTION_CLOSED = object()
+
+
+class TelemetrySubscription:
+    """An asynchronous iterator over received telemetry messages.
+
+    Created by [`AsyncDrone.subscribe`][blueye.sdk.async_drone.AsyncDrone.subscribe]. Iterating
+    yields tuples with the message type name and the message. Received messages wait in a bounded
+    queue, and if the consumer falls behind the oldest message is dropped. The iteration ends when
+    the subscription is closed, or when the drone is disconnected.
+
+    Args:
+        parent_drone (AsyncDrone): The drone the subscription belongs to.
+        msg_filter (List[proto.message.MessageMeta]): The message types to subscribe to. All
+                                                      message types if the list is empty.
+        raw (bool): Yield the serialized message instead of the deserialized one.
+        maxsize (int): The maximum number of messages waiting to be consumed.
+    """
+
+    def __init__(
+        self,
+        parent_drone: "AsyncDrone",
+        msg_filter: List[proto.message.MessageMeta],
+        raw: bool,
+        maxsize: int,
+    ):
+        self._parent_drone = parent_drone
+        self.msg_filter = msg_filter
+        self.raw = raw
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped_messages = 0
+        """The number of messages discarded because the consumer did not keep up"""
+        self.closed = False
+
+    def _put(self, msg_type_name: str, msg: proto.message.Message | bytes):
+        if self.closed:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped_messages += 1
+        self._queue.put_nowait((msg_type_name, msg))
+
+    def close(self):
+        """Stop receiving messages for this subscription.
+
+        Messages already received can still be consumed, after which the iteration ends.
+        """
+        if self.closed:
+            return
+        self._parent_drone._unsubscribe(self)
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped_messages += 1
+        self._queue.put_nowait(_SUBSCRIPTION_CLOSED)
+        self.closed = True
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, proto.message.Message | bytes]:
+        if self.closed and self._queue.empty():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _SUBSCRIPTION_CLOSED:
+            raise StopAsyncIteration
+        return item
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+class AsyncDrone:
+    """An asyncio interface to a Blueye drone.
+
+    Provides the connection handling, request-reply calls, telemetry and control messages of
+    [`Drone`][blueye.sdk.drone.Drone] as coroutines, built on `zmq.asyncio`. All sockets are
+    serviced by tasks on the running event loop, so no threads are spawned for the connection. The
+    only exception is the HTTP request for drone info when connecting, which runs in the default
+    executor.
+
+    The drone is not connected on instantiation, call
+    [`connect`][blueye.sdk.async_drone.AsyncDrone.connect] (or use the object as an async context
+    manager) from inside the event loop:
+
+    ```
+    async with AsyncDrone() as drone:
+        async with drone.subscribe([blueye.protocol.DepthTel]) as depth_messages:
+            async for msg_type, msg in depth_messages:
+                print(msg.depth.value)
+    ```
+    """
+
+    def __init__(self, ip: str = "192.168.1.101", context: Optional[zmq.asyncio.Context] = None):
+        """Initialize the AsyncDrone class.
+
+        Args:
+            ip (str, optional): The IP address of the drone.
+            context (zmq.asyncio.Context, optional): The ZeroMQ context.
+        """
+        self._ip = ip
+        self._zmq_context = context or zmq.asyncio.Context.instance()
+        self.connected = False
+        self.client_id: int = None
+        self.in_control: bool = False
+        self._telemetry_socket: Optional[zmq.asyncio.Socket] = None
+        self._ctrl_socket: Optional[zmq.asyncio.Socket] = None
+        self._req_rep_socket: Optional[zmq.asyncio.Socket] = None
+        self._req_rep_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self._subscriptions: List[TelemetrySubscription] = []
+        self._state: Dict[proto.message.MessageMeta, bytes] = {}
+        self._unknown_topics: Set[bytes] = set()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    def _update_drone_info(self, timeout: float):
+        """Request and store information about the drone.
+
+        Args:
+            timeout (float): The timeout for the request.
+
+        Raises:
+            ConnectionError: If the connection to the drone could not be established.
+        """
+        drone_info = request_drone_info(self._ip, timeout)
+        self.features = drone_info.features
+        self.software_version = drone_info.software_version
+        self.software_version_short = drone_info.software_version_short
+        self.serial_number = drone_info.serial_number
+        self.uuid = drone_info.uuid
+
+    def _create_req_rep_socket(self):
+        """Create (or recreate) the request-reply socket."""
+        if self._req_rep_socket is not None:
+            self._req_rep_socket.close(linger=0)
+        self._req_rep_socket = self._zmq_context.socket(zmq.REQ)
+        self._req_rep_socket.connect(f"tcp://{self._ip}:5556")
+
+    async def connect(
+        self,
+        client_info: blueye.protocol.ClientInfo = None,
+        timeout: float = 4,
+        connect_as_observer: bool = False,
+    ):
+        """Establish a connection to the drone.
+
+        Like [`Drone.connect`][blueye.sdk.drone.Drone.connect], the thruster set points are set to
+        zero when connecting if the client is in control.
+
+        Args:
+            client_info (blueye.protocol.ClientInfo, optional):
+                Information about the client connecting. If None, the SDK will attempt to read it
+                from the environment.
+            timeout (float, optional):
+                Seconds to wait for connection.
+            connect_as_observer (bool, optional):
+                If True, the client will not be promoted to in control of the drone.
+
+        Raises:
+            ConnectionError: If the connection attempt fails.
+            RuntimeError: If the Blunux version of the connected drone is too old.
+        """
+        logger.info(f"Attempting to connect to drone at {self._ip}")
+        # The drone info is only fetched once per connection, so the blocking HTTP request is run
+        # in the default executor instead of implementing an asynchronous HTTP client
+        await asyncio.to_thread(self._update_drone_info, timeout)
+        if version.parse(self.software_version_short) < version.parse("3.2"):
+            raise RuntimeError(
+                f"Blunux version of connected drone is {self.software_version_short}. Version "
+                "3.2 or higher is required."
+            )
+
+        self._telemetry_socket = self._zmq_context.socket(zmq.SUB)
+        self._telemetry_socket.connect(f"tcp://{self._ip}:5555")
+        self._telemetry_socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        self._ctrl_socket = self._zmq_context.socket(zmq.PUB)
+        self._ctrl_socket.connect(f"tcp://{self._ip}:5557")
+        self._create_req_rep_socket()
+        self._start_task(self._receive_telemetry(), "telemetry receiver")
+
+        try:
+            await self.ping()
+            connect_resp = await self.connect_client(
+                client_info=client_info, is_observer=connect_as_observer
+            )
+        except blueye.protocol.exceptions.ResponseTimeout as e:
+            await self._close()
+            raise ConnectionError("Could not establish connection with drone") from e
+        logger.info(f"Connection successful, client id: {connect_resp.client_id}")
+        self.client_id = connect_resp.client_id
+        self.in_control = connect_resp.client_id == connect_resp.client_id_in_control
+        self.connected = True
+        self._start_task(self._publish_watchdog(), "watchdog publisher")
+
+        if self.in_control:
+            await self.sync_time(int(time.time()))
+            await self.set_motion_input(0, 0, 0, 0, 0, 0)
+
+    async def disconnect(self):
+        """Disconnect from the drone, allowing another client to take control of it."""
+        if self.connected:
+            try:
+                await self.disconnect_client(self.client_id)
+            except blueye.protocol.exceptions.ResponseTimeout:
+                # If there's no response the connection is likely already closed
+                pass
+        await self._close()
+
+    def _start_task(self, coro, name: str):
+        """Run a coroutine as a background task, logging it if it fails.
+
+        Args:
+            coro: The coroutine to run.
+            name (str): The name of the task, used when logging.
+        """
+        task = asyncio.create_task(coro, name=name)
+        task.add_done_callback(self._log_task_failure)
+        self._tasks.append(task)
+
+    @staticmethod
+    def _log_task_failure(task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error(f"The {task.get_name()} task stopped unexpectedly", exc_info=task.exception())
+
+    async def _close(self):
+        """Cancel the background tasks, close the subscriptions, and close the sockets."""
+        for subscription in self._subscriptions:
+            subscription.close()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for socket in (self._telemetry_socket, self._ctrl_socket, self._req_rep_socket):
+            if socket is not None:
+                socket.close(linger=0)
+        self._telemetry_socket = None
+        self._ctrl_socket = None
+        self._req_rep_socket = None
+        self.connected = False
+
+    async def _publish_watchdog(self):
+        """Send a watchdog message every second to keep the connection alive."""
+        duration = 0
+        while True:
+            await self.send_ctrl_msg(
+                blueye.protocol.WatchdogCtrl(
+                    connection_duration={"value": duration}, client_id=self.client_id
+                )
+            )
+            duration += 1
+            await asyncio.sleep(1)
+
+    async def _receive_telemetry(self):
+        """Receive telemetry messages and pass them on to the subscriptions."""
+        try:
+            while True:
+                msg = await self._telemetry_socket.recv_multipart()
+                self._handle_telemetry_message(msg)
+        finally:
+            # No more messages will arrive, so the consumers should not keep waiting
+            for subscription in self._subscriptions:
+                subscription.close()
+
+    def _handle_telemetry_message(self, msg: Tuple[bytes, bytes]):
+        """Store an incoming telemetry message and pass it on to the matching subscriptions.
+
+        Args:
+            msg (Tuple[bytes, bytes]): The message type and payload.
+        """
+        topic_type = message_type_from_topic(msg[0])
+        if topic_type is None:
+            if msg[0] not in self._unknown_topics:
+                self._unknown_topics.add(msg[0])
+                logger.info(f"Ignoring unknown message type: {msg[0].decode('utf-8')}")
+            return
+        msg_type, msg_type_name = topic_type
+        msg_payload = msg[1]
+        self._state[msg_type] = msg_payload
+        msg_deserialized = None
+        for subscription in self._subscriptions:
+            if subscription.msg_filter and msg_type not in subscription.msg_filter:
+                continue
+            if subscription.raw:
+                subscription._put(msg_type_name, msg_payload)
+                continue
+            if msg_deserialized is None:
+                msg_deserialized = msg_type.deserialize(msg_payload)
+            subscription._put(msg_type_name, msg_deserialized)
+
+    def subscribe(
+        self,
+        msg_filter: List[proto.message.MessageMeta],
+        raw: bool = False,
+        maxsize: int = 100,
+    ) -> TelemetrySubscription:
+        """Subscribe to telemetry messages.
+
+        Args:
+            msg_filter (List[proto.message.MessageMeta]):
+                A list of message types to subscribe to. E.g., `[blueye.protocol.DepthTel]`. If the
+                list is empty, all message types are included.
+            raw (bool, optional):
+                Yield the serialized message instead of the deserialized one.
+            maxsize (int, optional):
+                The maximum number of messages waiting to be consumed before the oldest ones are
+                dropped.
+
+        Returns:
+            A subscription to iterate over with `async for`. Close it, or use it as an async
+            context manager, when you no longer want to receive messages. The subscription is
+            closed when the drone is disconnected.
+        """
+        subscription = TelemetrySubscription(self, msg_filter, raw, maxsize)
+        self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def _unsubscribe(self, subscription: TelemetrySubscription):
+        self._subscriptions = [sub for sub in self._subscriptions if sub is not subscription]
+
+    def get_telemetry(
+        self, msg_type: proto.message.MessageMeta, deserialize: bool = True
+    ) -> Optional[proto.message.Message | bytes]:
+        """Get the latest received telemetry message of the specified type.
+
+        Args:
+            msg_type (proto.message.MessageMeta):
+                The message type to get. E.g., blueye.protocol.DepthTel.
+            deserialize (bool, optional):
+                If False, the raw bytes will be returned.
+
+        Returns:
+            The latest message of the specified type, or None if no message has been received yet.
+        """
+        msg = self._state.get(msg_type)
+        if msg is None or not deserialize:
+            return msg
+        return msg_type.deserialize(msg)
+
+    async def send_ctrl_msg(self, msg: proto.message.Message):
+        """Send a control message to the drone.
+
+        Args:
+            msg (proto.message.Message): The control message, e.g. blueye.protocol.LightsCtrl.
+        """
+        await self._ctrl_socket.send_multipart(
+            [
+                bytes(msg._pb.DESCRIPTOR.full_name, "utf-8"),
+                msg.__class__.serialize(msg),
+            ]
+        )
+
+    async def set_lights(self, value: float):
+        """Set the intensity of the lights.
+
+        Args:
+            value (float): The intensity value (0..1).
+        """
+        await self.send_ctrl_msg(blueye.protocol.LightsCtrl(lights={"value": value}))
+
+    async def set_motion_input(
+        self, surge: float, sway: float, heave: float, yaw: float, slow: float, boost: float
+    ):
+        """Set the motion input values.
+
+        Args:
+            surge (float): The surge value.
+            sway (float): The sway value.
+            heave (float): The heave value.
+            yaw (float): The yaw value.
+            slow (float): The slow value.
+            boost (float): The boost value.
+        """
+        await self.send_ctrl_msg(
+            blueye.protocol.MotionInputCtrl(
+                motion_input={
+                    "surge": surge,
+                    "sway": sway,
+                    "heave": heave,
+                    "yaw": yaw,
+                    "slow": slow,
+                    "boost": boost,
+                }
+            )
+        )
+
+    async def request(
+        self,
+        request: proto.message.Message,
+        expected_response: proto.message.MessageMeta,
+        timeout: float,
+    ) -> proto.message.Message:
+        """Send a request and wait for the response.
+
+        Requests are sent one at a time. If no reply is received, because the request timed out or
+        was cancelled, the socket is recreated so later requests are not affected by the missing
+        reply.
+
+        Args:
+            request (proto.message.Message): The request message.
+            expected_response (proto.message.MessageMeta): The expected response message type.
+            timeout (float): The timeout for the response.
+
+        Returns:
+            The response message.
+
+        Raises:
+            blueye.protocol.exceptions.ResponseTimeout: If no response is received before the
+                                                        timeout.
+        """
+        async with self._req_rep_lock:
+            resp = None
+            try:
+                await self._req_rep_socket.send_multipart(
+                    [
+                        bytes(request._pb.DESCRIPTOR.full_name, "utf-8"),
+                        request.__class__.serialize(request),
+                    ]
+                )
+                resp = await asyncio.wait_for(self._req_rep_socket.recv_multipart(), timeout)
+            except asyncio.TimeoutError:
+                raise blueye.protocol.exceptions.ResponseTimeout(
+                    "No response received from drone before timeout"
+                )
+            finally:
+                if resp is None:
+                    # The REQ socket only accepts a new request after receiving the reply, so it
+                    # has to be recreated on timeout, cancellation, or any other error
+                    self._create_req_rep_socket()
+        return expected_response.deserialize(resp[1])
+
+    async def ping(self, timeout: float = 1.0) -> blueye.protocol.PingRep:
+        """Ping the drone.
+
+        Args:
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The ping response.
+        """
+        return await self.request(blueye.protocol.PingReq(), blueye.protocol.PingRep, timeout)
+
+    async def connect_client(
+        self,
+        client_info: blueye.protocol.ClientInfo = None,
+        is_observer: bool = False,
+        timeout: float = 0.05,
+    ) -> blueye.protocol.ConnectClientRep:
+        """Connect a client to the drone.
+
+        Args:
+            client_info (blueye.protocol.ClientInfo, optional): The client information.
+            is_observer (bool, optional): Whether the client is an observer.
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The connect client response.
+        """
+        client = client_info or ReqRepClient._get_client_info()
+        client.is_observer = is_observer
+        request = blueye.protocol.ConnectClientReq(client_info=client)
+        return await self.request(request, blueye.protocol.ConnectClientRep, timeout)
+
+    async def disconnect_client(
+        self, client_id: int, timeout: float = 0.05
+    ) -> blueye.protocol.DisconnectClientRep:
+        """Disconnect a client from the drone.
+
+        Args:
+            client_id (int): The client ID.
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The disconnect client response.
+        """
+        request = blueye.protocol.DisconnectClientReq(client_id=client_id)
+        return await self.request(request, blueye.protocol.DisconnectClientRep, timeout)
+
+    async def sync_time(self, time: int, timeout: float = 0.05) -> blueye.protocol.SyncTimeRep:
+        """Synchronize the time with the drone.
+
+        Args:
+            time (int): The Unix timestamp to synchronize.
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The response message.
+        """
+        request = blueye.protocol.SyncTimeReq(
+            time={"unix_timestamp": {"seconds": time, "nanos": 0}}
+        )
+        return await self.request(request, blueye.protocol.SyncTimeRep, timeout)
+
+    async def set_telemetry_msg_publish_frequency(
+        self, msg: proto.message.MessageMeta | str, frequency: float, timeout: float = 0.05
+    ) -> blueye.protocol.SetPubFrequencyRep:
+        """Set the telemetry message publish frequency.
+
+        Args:
+            msg (proto.message.MessageMeta | str): The message type.
+            frequency (float): The publish frequency.
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The set publish frequency response.
+        """
+        request = blueye.protocol.SetPubFrequencyReq(
+            message_type=ReqRepClient._parse_type_to_string(msg),
+            frequency=frequency,
+        )
+        return await self.request(request, blueye.protocol.SetPubFrequencyRep, timeout)
+
+    async def get_telemetry_msg(
+        self, msg: proto.message.MessageMeta | str, timeout: float = 0.05
+    ) -> blueye.protocol.GetTelemetryRep:
+        """Request the latest telemetry message of a type from the drone.
+
+        Args:
+            msg (proto.message.MessageMeta | str): The message type.
+            timeout (float, optional): The timeout for the response.
+
+        Returns:
+            The telemetry message.
+        """
+        request = blueye.protocol.GetTelemetryReq(
+            message_type=ReqRepClient._parse_type_to_string(msg)
+        )
+        return await self.request(request, blueye.protocol.GetTelemetryRep, timeout)
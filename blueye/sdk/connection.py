@@ -1,17 +1,26 @@
 from __future__ import annotations
 
+import array
+import bisect
+import concurrent.futures
 import importlib.metadata
+import itertools
 import logging
+import math
 import platform
 import queue
 import threading
+import time
 import uuid
-from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 import blueye.protocol
 import proto
 import zmq
 
+from .constants import CallbackOverflowPolicy
+from .utils import FrozenMessage, message_type_from_topic
+
 logger = logging.getLogger(__name__)
 
 
@@ -60,6 +69,251 @@ class WatchdogPublisher(threading.Thread):
         self._exit_flag.set()
 
 
+class CallbackWorker(threading.Thread):
+    """A thread that runs a telemetry callback outside of the telemetry receive thread.
+
+    Messages are handed over through a bounded queue, so a slow callback will not delay the other
+    callbacks or the receiving of telemetry. What happens when the queue is full is decided by the
+    overflow policy.
+
+    Args:
+        function (Callable[[str, proto.message.Message], None]): The callback function.
+        kwargs (Dict[str, Any]): Additional keyword arguments for the callback.
+        queue_size (int, optional): The maximum number of messages waiting to be handled.
+        overflow_policy (str, optional): One of the policies in
+            [CallbackOverflowPolicy][blueye.sdk.constants.CallbackOverflowPolicy].
+    """
+
+    def __init__(
+        self,
+        function: Callable[[str, proto.message.Message], None],
+        kwargs: Dict[str, Any],
+        queue_size: int = 100,
+        overflow_policy: str = CallbackOverflowPolicy.drop_oldest,
+    ):
+        super().__init__(daemon=True)
+        if overflow_policy not in (
+            CallbackOverflowPolicy.drop_oldest,
+            CallbackOverflowPolicy.drop_newest,
+            CallbackOverflowPolicy.block,
+        ):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self._function = function
+        self._kwargs = kwargs
+        self._overflow_policy = overflow_policy
+        self._messages_to_handle = queue.Queue(maxsize=queue_size)
+        self._exit_flag = threading.Event()
+        self.dropped_messages = 0
+        """The number of messages discarded because the queue was full"""
+
+    def submit(self, msg_type_name: str, msg: proto.message.Message | bytes):
+        """Queue a message for the callback, applying the overflow policy if the queue is full.
+
+        Args:
+            msg_type_name (str): The message type name.
+            msg (proto.message.Message | bytes): The message, or the raw data.
+        """
+        item = (msg_type_name, msg)
+        if self._overflow_policy == CallbackOverflowPolicy.block:
+            while not self._exit_flag.is_set():
+                try:
+                    self._messages_to_handle.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        elif self._overflow_policy == CallbackOverflowPolicy.drop_newest:
+            try:
+                self._messages_to_handle.put_nowait(item)
+            except queue.Full:
+                self.dropped_messages += 1
+        else:
+            while True:
+                try:
+                    self._messages_to_handle.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._messages_to_handle.get_nowait()
+                        self.dropped_messages += 1
+                    except queue.Empty:
+                        # The worker emptied the queue in the meantime
+                        pass
+
+    def run(self):
+        """Run the callback worker thread."""
+        while not self._exit_flag.is_set():
+            try:
+                msg_type_name, msg = self._messages_to_handle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self._function(msg_type_name, msg, **self._kwargs)
+            except Exception:
+                logger.exception(f"Telemetry callback raised an exception for {msg_type_name}")
+
+    def stop(self):
+        """Stop the callback worker thread."""
+        self._exit_flag.set()
+
+
+class CallbackDecimator:
+    """Decides which telemetry messages to pass on to a rate limited callback.
+
+    The decision is made per message type, before the message is deserialized, so skipped
+    messages cost almost nothing.
+
+    Args:
+        every_nth (int, optional): Only pass on every n-th message of each type.
+        max_rate_hz (float, optional): Maximum rate to pass on messages of each type at.
+    """
+
+    def __init__(self, every_nth: int = 1, max_rate_hz: Optional[float] = None):
+        if every_nth < 1:
+            raise ValueError(f"every_nth must be 1 or larger, got {every_nth}")
+        if max_rate_hz is not None and max_rate_hz <= 0:
+            raise ValueError(f"max_rate_hz must be larger than 0, got {max_rate_hz}")
+        self._every_nth = every_nth
+        self._min_interval = 0 if max_rate_hz is None else 1 / max_rate_hz
+        self._counts: Dict[proto.message.MessageMeta, int] = {}
+        self._last_accepted: Dict[proto.message.MessageMeta, float] = {}
+
+    def accept(self, msg_type: proto.message.MessageMeta) -> bool:
+        """Check if a message of the given type should be passed on to the callback.
+
+        Args:
+            msg_type (proto.message.MessageMeta): The type of the received message.
+
+        Returns:
+            bool: True if the message should be passed on.
+        """
+        count = self._counts.get(msg_type, 0)
+        self._counts[msg_type] = count + 1
+        if count % self._every_nth != 0:
+            return False
+        if self._min_interval > 0:
+            now = time.monotonic()
+            last_accepted = self._last_accepted.get(msg_type)
+            if last_accepted is not None and now - last_accepted < self._min_interval:
+                return False
+            self._last_accepted[msg_type] = now
+        return True
+
+
+class MessageHistory:
+    """A bounded ring buffer of the latest received messages of one type.
+
+    The buffer for the receive timestamps is allocated up front, and the payloads are kept as
+    references to the received bytes objects, so adding a message neither allocates nor copies.
+
+    Args:
+        max_messages (int): The number of messages to keep. The oldest message is overwritten when
+                            the buffer is full.
+    """
+
+    def __init__(self, max_messages: int):
+        if max_messages < 1:
+            raise ValueError(f"max_messages must be 1 or larger, got {max_messages}")
+        self.max_messages = max_messages
+        self._timestamps = array.array("d", bytes(8 * max_messages))
+        self._payloads: List[Optional[bytes]] = [None] * max_messages
+        self._next_index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, payload: bytes):
+        """Add a message to the buffer.
+
+        Args:
+            timestamp (float): The time the message was received, in seconds since the epoch.
+            payload (bytes): The serialized message.
+        """
+        index = self._next_index
+        self._timestamps[index] = timestamp
+        self._payloads[index] = payload
+        self._next_index = index + 1 if index + 1 < self.max_messages else 0
+        if self._count < self.max_messages:
+            self._count += 1
+
+    def snapshot(self, since: Optional[float] = None) -> Tuple[List[float], List[bytes]]:
+        """Get the messages in the buffer, oldest first.
+
+        Args:
+            since (float, optional): Only include messages received at or after this time, in
+                                     seconds since the epoch.
+
+        Returns:
+            Tuple[List[float], List[bytes]]: The receive timestamps and payloads of the messages.
+        """
+        start = self._next_index - self._count
+        if start >= 0:
+            timestamps = self._timestamps[start : self._next_index].tolist()
+            payloads = self._payloads[start : self._next_index]
+        else:
+            timestamps = (self._timestamps[start:] + self._timestamps[: self._next_index]).tolist()
+            payloads = self._payloads[start:] + self._payloads[: self._next_index]
+        if since is not None:
+            first = bisect.bisect_left(timestamps, since)
+            timestamps = timestamps[first:]
+            payloads = payloads[first:]
+        return timestamps, payloads
+
+
+class TelemetryHistory(Sequence):
+    """The received messages of one type, oldest first.
+
+    Items are `(timestamp, message)` tuples, where the timestamp is the time the message was
+    received, in seconds since the epoch. Messages are only deserialized when they are accessed,
+    so looking at the timestamps, or at a few of the messages, is cheap.
+
+    Attributes:
+        msg_type (proto.message.MessageMeta): The type of the messages.
+        timestamps (List[float]): The receive timestamps of the messages.
+        payloads (List[bytes]): The serialized messages.
+    """
+
+    def __init__(
+        self,
+        msg_type: proto.message.MessageMeta,
+        timestamps: List[float],
+        payloads: List[bytes],
+        raw_pb: bool = False,
+    ):
+        """Initialize the TelemetryHistory.
+
+        Args:
+            msg_type (proto.message.MessageMeta): The type of the messages.
+            timestamps (List[float]): The receive timestamps of the messages.
+            payloads (List[bytes]): The serialized messages.
+            raw_pb (bool, optional): Return the messages as protobuf messages instead of
+                                     proto-plus messages.
+        """
+        self.msg_type = msg_type
+        self.timestamps = timestamps
+        self.payloads = payloads
+        self._raw_pb = raw_pb
+        self._decode = msg_type.pb().FromString if raw_pb else msg_type.deserialize
+        self._messages: List[Optional[proto.message.Message]] = [None] * len(payloads)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TelemetryHistory(
+                self.msg_type, self.timestamps[index], self.payloads[index], self._raw_pb
+            )
+        msg = self._messages[index]
+        if msg is None:
+            msg = self._decode(self.payloads[index])
+            self._messages[index] = msg
+        return self.timestamps[index], msg
+
+    def __repr__(self) -> str:
+        return f"<TelemetryHistory of {len(self)} {self.msg_type.__name__} messages>"
+
+
 class Callback(NamedTuple):
     """Specifications for callback for telemetry messages.
 
@@ -69,6 +323,11 @@ class Callback(NamedTuple):
         pass_raw_data (bool): Whether to pass raw data to the callback.
         uuid_hex (str): The UUID of the callback in hexadecimal format.
         kwargs (Dict[str, Any]): Additional keyword arguments for the callback.
+        read_only (bool): Whether to pass a read-only view of the deserialized message.
+        worker (CallbackWorker, optional): The thread running the callback, if it should not be
+                                           called from the telemetry receive thread.
+        decimator (CallbackDecimator, optional): Skips messages for rate limited callbacks.
+        raw_pb (bool): Whether to pass the protobuf message instead of the proto-plus wrapper.
     """
 
     message_filter: List[proto.messages.Message]
@@ -76,6 +335,10 @@ class Callback(NamedTuple):
     pass_raw_data: bool
     uuid_hex: str
     kwargs: Dict[str, Any]
+    read_only: bool = False
+    worker: Optional[CallbackWorker] = None
+    decimator: Optional[CallbackDecimator] = None
+    raw_pb: bool = False
 
 
 class TelemetryClient(threading.Thread):
@@ -94,13 +357,35 @@ class TelemetryClient(threading.Thread):
         self._socket = self._zmq_context.socket(zmq.SUB)
         self._socket.connect(f"tcp://{self._parent_drone._ip}:5555")
         self._socket.setsockopt_string(zmq.SUBSCRIBE, "")
+        # Inproc socket pair used by stop() to wake the receive loop, so that run() can block on
+        # the sockets instead of polling with a timeout
+        wakeup_address = f"inproc://telemetry-wakeup-{uuid.uuid4().hex}"
+        self._wakeup_receiver = self._zmq_context.socket(zmq.PAIR)
+        self._wakeup_receiver.bind(wakeup_address)
+        self._wakeup_sender = self._zmq_context.socket(zmq.PAIR)
+        self._wakeup_sender.connect(wakeup_address)
+        self._wakeup_lock = threading.Lock()
         self._exit_flag = threading.Event()
         self._state_lock = threading.Lock()
         self._callbacks: List[Callback] = []
+        self._callbacks_by_type: Dict[proto.message.MessageMeta, List[Callback]] = {}
+        """`_callbacks_by_type` maps each message type with at least one registered callback to
+        the callbacks that should run for it (including the wildcard ones), in registration order.
+        It is rebuilt whenever a callback is added or removed."""
+        self._wildcard_callbacks: List[Callback] = []
         self._state: Dict[proto.message.Message, bytes] = {}
         """`_state` is dictionary of the latest received messages, where the key is the protobuf
         message class, eg. blueye.protocol.DepthTel and the value is the serialized protobuf
         message"""
+        self._state_sequence: Dict[proto.message.Message, int] = {}
+        """`_state_sequence` counts the number of received messages of each type, and is used to
+        tell if a message in `_state` has been replaced"""
+        self._decoded_state: Dict[proto.message.Message, Tuple[int, proto.message.Message]] = {}
+        """`_decoded_state` caches the deserialized version of the messages in `_state`, together
+        with the sequence number of the message it was decoded from"""
+        self._unknown_topics: Set[bytes] = set()
+        self._history: Dict[proto.message.MessageMeta, MessageHistory] = {}
+        """`_history` holds the ring buffers of the message types history is enabled for"""
 
     def _handle_message(self, msg: Tuple[bytes, bytes]):
         """Handle an incoming telemetry message.
@@ -108,41 +393,128 @@ class TelemetryClient(threading.Thread):
         Args:
             msg (Tuple[bytes, bytes]): The message type and payload.
         """
-        msg_type_name = msg[0].decode("utf-8").replace("blueye.protocol.", "")
-        try:
-            msg_type = blueye.protocol.__getattribute__(msg_type_name)
-        except AttributeError:
-            # If a new telemetry message is introduced before the SDK is updated this can
-            # be a common occurrence, so choosing to log with info instead of warning
-            logger.info(f"Ignoring unknown message type: {msg_type_name}")
+        topic_type = message_type_from_topic(msg[0])
+        if topic_type is None:
+            if msg[0] not in self._unknown_topics:
+                # If a new telemetry message is introduced before the SDK is updated this can
+                # be a common occurrence, so choosing to log with info instead of warning, and
+                # only the first time the message type is seen
+                self._unknown_topics.add(msg[0])
+                logger.info(f"Ignoring unknown message type: {msg[0].decode('utf-8')}")
             return
+        msg_type, msg_type_name = topic_type
         msg_payload = msg[1]
         with self._state_lock:
             self._state[msg_type] = msg_payload
-        for callback in self._callbacks:
-            if msg_type in callback.message_filter or callback.message_filter == []:
-                if callback.pass_raw_data:
-                    callback.function(msg_type_name, msg_payload, **callback.kwargs)
+            self._state_sequence[msg_type] = self._state_sequence.get(msg_type, 0) + 1
+            history = self._history.get(msg_type)
+            if history is not None:
+                history.append(time.time(), msg_payload)
+
+        # The message is deserialized at most once, and shared by all callbacks that want it. The
+        # proto-plus message wraps the protobuf message without copying it.
+        msg_pb = None
+        msg_deserialized = None
+        msg_frozen = None
+        for callback in self._callbacks_by_type.get(msg_type, self._wildcard_callbacks):
+            if callback.decimator is not None and not callback.decimator.accept(msg_type):
+                continue
+            if callback.pass_raw_data:
+                msg_for_callback = msg_payload
+            elif callback.raw_pb:
+                if msg_pb is None:
+                    msg_pb = (
+                        msg_type.pb().FromString(msg_payload)
+                        if msg_deserialized is None
+                        else msg_deserialized._pb
+                    )
+                msg_for_callback = msg_pb
+            else:
+                if msg_deserialized is None:
+                    msg_deserialized = (
+                        msg_type.deserialize(msg_payload)
+                        if msg_pb is None
+                        else msg_type.wrap(msg_pb)
+                    )
+                if callback.read_only:
+                    if msg_frozen is None:
+                        msg_frozen = FrozenMessage(msg_deserialized)
+                    msg_for_callback = msg_frozen
                 else:
-                    msg_deserialized = msg_type.deserialize(msg_payload)
-                    callback.function(msg_type_name, msg_deserialized, **callback.kwargs)
+                    msg_for_callback = msg_deserialized
+            if callback.worker is not None:
+                callback.worker.submit(msg_type_name, msg_for_callback)
+            else:
+                callback.function(msg_type_name, msg_for_callback, **callback.kwargs)
+
+    def _rebuild_dispatch_table(self):
+        """Rebuild the lookup tables used to find the callbacks for a message type.
+
+        New containers are created and swapped in, so the receive thread always iterates over a
+        consistent snapshot, even if a callback is removed from within a callback.
+        """
+        wildcard_callbacks = [cb for cb in self._callbacks if cb.message_filter == []]
+        filtered_types = {msg_type for cb in self._callbacks for msg_type in cb.message_filter}
+        callbacks_by_type = {
+            msg_type: [
+                cb
+                for cb in self._callbacks
+                if cb.message_filter == [] or msg_type in cb.message_filter
+            ]
+            for msg_type in filtered_types
+        }
+        self._callbacks_by_type = callbacks_by_type
+        self._wildcard_callbacks = wildcard_callbacks
+
+    def _drain_socket(self):
+        """Receive and handle every message that is ready on the socket without blocking."""
+        while not self._exit_flag.is_set():
+            try:
+                msg = self._socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            self._handle_message(msg)
 
     def run(self):
-        """Run the telemetry client thread."""
+        """Run the telemetry client thread.
+
+        Blocks until either telemetry arrives or `stop` is called, and handles all queued messages
+        in one burst when woken up.
+        """
         poller = zmq.Poller()
         poller.register(self._socket, zmq.POLLIN)
+        poller.register(self._wakeup_receiver, zmq.POLLIN)
 
-        while not self._exit_flag.is_set():
-            events_to_be_processed = poller.poll(10)
-            if len(events_to_be_processed) > 0:
-                msg = self._socket.recv_multipart()
-                self._handle_message(msg)
+        try:
+            while not self._exit_flag.is_set():
+                events = dict(poller.poll())
+                if self._socket in events:
+                    self._drain_socket()
+        finally:
+            self._close_sockets()
+
+    def _close_sockets(self):
+        """Close the sockets once the thread is done with them."""
+        # The sockets are closed here, since they belong to the shared context and would otherwise
+        # be kept open after every disconnect
+        self._socket.close(linger=0)
+        self._wakeup_receiver.close(linger=0)
+        with self._wakeup_lock:
+            self._wakeup_sender.close(linger=0)
 
     def add_callback(
         self,
         msg_filter: List[proto.message.Message],
         callback_function: Callable[[str, proto.message.Message], None],
         raw: bool,
+        read_only: bool = False,
+        run_in_thread: bool = False,
+        queue_size: int = 100,
+        overflow_policy: str = CallbackOverflowPolicy.drop_oldest,
+        max_rate_hz: Optional[float] = None,
+        every_nth: int = 1,
+        latest_only: bool = False,
+        raw_pb: bool = False,
         **kwargs: Dict[str, Any],
     ) -> str:
         """Add a callback for telemetry messages.
@@ -152,13 +524,57 @@ class TelemetryClient(threading.Thread):
                                                       function for.
             callback_function (Callable[[str, proto.message.Message], None]): The callback function.
             raw (bool): Whether to pass raw data to the callback.
+            read_only (bool, optional): Whether to pass a read-only view of the deserialized
+                                        message to the callback.
+            run_in_thread (bool, optional): Whether to run the callback in a dedicated
+                                            [CallbackWorker][blueye.sdk.connection.CallbackWorker]
+                                            thread.
+            queue_size (int, optional): The queue size of the worker thread.
+            overflow_policy (str, optional): The overflow policy of the worker thread.
+            max_rate_hz (float, optional): Maximum rate to call the callback at, per message type.
+            every_nth (int, optional): Only call the callback for every n-th message of each type.
+            latest_only (bool, optional): Run the callback in a worker thread that only keeps the
+                                          latest message, so a slow callback always gets the
+                                          newest data. Overrides `run_in_thread`, `queue_size` and
+                                          `overflow_policy`.
+            raw_pb (bool, optional): Whether to pass the underlying protobuf message instead of the
+                                     proto-plus wrapper to the callback.
             **kwargs: Additional keyword arguments for the callback.
 
+        Raises:
+            ValueError: If both `read_only` and `raw_pb` are set.
+
         Returns:
             str: The UUID of the callback in hexadecimal format.
         """
+        if read_only and raw_pb:
+            raise ValueError("read_only is not supported for raw protobuf messages")
         uuid_hex = uuid.uuid1().hex
-        self._callbacks.append(Callback(msg_filter, callback_function, raw, uuid_hex, kwargs))
+        decimator = None
+        if max_rate_hz is not None or every_nth != 1:
+            decimator = CallbackDecimator(every_nth, max_rate_hz)
+        if latest_only:
+            run_in_thread = True
+            queue_size = 1
+            overflow_policy = CallbackOverflowPolicy.drop_oldest
+        worker = None
+        if run_in_thread:
+            worker = CallbackWorker(callback_function, kwargs, queue_size, overflow_policy)
+            worker.start()
+        self._callbacks.append(
+            Callback(
+                msg_filter,
+                callback_function,
+                raw,
+                uuid_hex,
+                kwargs,
+                read_only,
+                worker,
+                decimator,
+                raw_pb,
+            )
+        )
+        self._rebuild_dispatch_table()
         return uuid_hex
 
     def remove_callback(self, callback_id: str):
@@ -168,9 +584,33 @@ class TelemetryClient(threading.Thread):
             callback_id (str): The UUID of the callback to remove.
         """
         try:
-            self._callbacks.pop([cb.uuid_hex for cb in self._callbacks].index(callback_id))
+            callback = self._callbacks.pop(
+                [cb.uuid_hex for cb in self._callbacks].index(callback_id)
+            )
         except ValueError:
             logger.warning(f"Callback with id {callback_id} not found, ignoring")
+            return
+        self._rebuild_dispatch_table()
+        if callback.worker is not None:
+            callback.worker.stop()
+
+    def get_dropped_messages(self, callback_id: str) -> int:
+        """Get the number of messages dropped by the worker thread of a callback.
+
+        Args:
+            callback_id (str): The UUID of the callback.
+
+        Returns:
+            int: The number of dropped messages. Always 0 for callbacks that are not run in their
+                 own thread.
+
+        Raises:
+            KeyError: If there is no callback with the given UUID.
+        """
+        for callback in self._callbacks:
+            if callback.uuid_hex == callback_id:
+                return 0 if callback.worker is None else callback.worker.dropped_messages
+        raise KeyError(f"Callback with id {callback_id} not found")
 
     def get(self, key: proto.message.Message) -> bytes:
         """Get the latest received message of a specific type.
@@ -184,9 +624,121 @@ class TelemetryClient(threading.Thread):
         with self._state_lock:
             return self._state[key]
 
+    def get_sequence_number(self, key: proto.message.Message) -> int:
+        """Get the number of messages of a specific type received so far.
+
+        The number increases every time a new message of the type is received, and can be used to
+        check if the message has been updated since it was last read.
+
+        Args:
+            key (proto.message.Message): The message type to check.
+
+        Returns:
+            int: The sequence number of the latest message, 0 if none has been received.
+        """
+        with self._state_lock:
+            return self._state_sequence.get(key, 0)
+
+    def get_deserialized(
+        self, key: proto.message.Message, raw_pb: bool = False
+    ) -> proto.message.Message:
+        """Get the latest received message of a specific type, deserialized.
+
+        The deserialized message is cached until a new message of the same type is received, so
+        repeated calls are cheap. The returned object is shared between callers and should not be
+        modified.
+
+        Args:
+            key (proto.message.Message): The message type to retrieve.
+            raw_pb (bool, optional): Return the underlying protobuf message instead of the
+                                     proto-plus wrapper.
+
+        Returns:
+            proto.message.Message: The deserialized message.
+
+        Raises:
+            KeyError: If no message of the type has been received.
+        """
+        with self._state_lock:
+            payload = self._state[key]
+            sequence = self._state_sequence.get(key, 0)
+            cached = self._decoded_state.get(key)
+        if cached is not None and cached[0] == sequence:
+            msg = cached[1]
+        else:
+            msg = key.deserialize(payload)
+            with self._state_lock:
+                self._decoded_state[key] = (sequence, msg)
+        # The proto-plus message wraps the protobuf message, so both share the cache
+        return msg._pb if raw_pb else msg
+
+    def enable_history(self, key: proto.message.MessageMeta, max_messages: int):
+        """Start keeping a history of the received messages of a specific type.
+
+        If history is already enabled for the type, the stored messages are discarded.
+
+        Args:
+            key (proto.message.MessageMeta): The message type to keep history for.
+            max_messages (int): The number of messages to keep.
+        """
+        history = MessageHistory(max_messages)
+        with self._state_lock:
+            self._history[key] = history
+
+    def disable_history(self, key: proto.message.MessageMeta):
+        """Stop keeping a history of the received messages of a specific type.
+
+        Args:
+            key (proto.message.MessageMeta): The message type to stop keeping history for.
+        """
+        with self._state_lock:
+            self._history.pop(key, None)
+
+    def get_history(
+        self,
+        key: proto.message.MessageMeta,
+        seconds: Optional[float] = None,
+        raw_pb: bool = False,
+    ) -> TelemetryHistory:
+        """Get the stored history of a specific message type.
+
+        Args:
+            key (proto.message.MessageMeta): The message type to get the history of.
+            seconds (float, optional): Only include the messages received during the last
+                                       `seconds` seconds.
+            raw_pb (bool, optional): Return the messages as protobuf messages instead of
+                                     proto-plus messages.
+
+        Returns:
+            TelemetryHistory: The stored messages, oldest first.
+
+        Raises:
+            KeyError: If history is not enabled for the message type.
+        """
+        since = None if seconds is None else time.time() - seconds
+        with self._state_lock:
+            try:
+                history = self._history[key]
+            except KeyError:
+                raise KeyError(f"History is not enabled for {key.__name__}") from None
+            timestamps, payloads = history.snapshot(since)
+        return TelemetryHistory(key, timestamps, payloads, raw_pb)
+
     def stop(self):
-        """Stop the telemetry client thread."""
+        """Stop the telemetry client thread, and the worker threads of its callbacks."""
         self._exit_flag.set()
+        for callback in self._callbacks:
+            if callback.worker is not None:
+                callback.worker.stop()
+        with self._wakeup_lock:
+            if self._wakeup_sender.closed:
+                # The receive loop has already exited
+                return
+            try:
+                self._wakeup_sender.send(b"", zmq.NOBLOCK)
+            except zmq.Again:
+                # A wake-up message is already pending, so the receive loop will exit anyway
+                pass
 
 
 class CtrlClient(threading.Thread):
@@ -420,22 +972,64 @@ class CtrlClient(threading.Thread):
 
 
 class ReqRepClient(threading.Thread):
-    """A thread that handles request-reply messages to and from the drone."""
+    """A thread that handles request-reply messages to and from the drone.
 
-    def __init__(self, parent_drone: "blueye.sdk.Drone", context: zmq.Context = None):
+    By default requests are sent through a REQ socket, one at a time. In pipelined mode a DEALER
+    socket is used instead, and every request is sent with an id frame in its envelope. The drone
+    returns the envelope with the reply, which lets several requests be in flight at once, and
+    replies arriving after their request has timed out to be dropped.
+    """
+
+    def __init__(
+        self,
+        parent_drone: "blueye.sdk.Drone",
+        context: zmq.Context = None,
+        pipelined: bool = False,
+    ):
         """Initialize the ReqRepClient.
 
         Args:
             parent_drone (blueye.sdk.Drone): The parent drone instance.
             context (zmq.Context, optional): The ZeroMQ context.
+            pipelined (bool, optional): Use a DEALER socket to allow concurrent requests.
         """
         super().__init__(daemon=True)
         self._zmq_context = context or zmq.Context().instance()
         self._parent_drone = parent_drone
-        self._socket = self._zmq_context.socket(zmq.REQ)
+        self._pipelined = pipelined
+        self._socket = self._zmq_context.socket(zmq.DEALER if pipelined else zmq.REQ)
         self._socket.connect(f"tcp://{self._parent_drone._ip}:5556")
         self._requests_to_send = queue.Queue()
         self._exit_flag = threading.Event()
+        self._pending_requests: Dict[
+            bytes, Tuple[proto.message.MessageMeta, concurrent.futures.Future, float]
+        ] = {}
+        """`_pending_requests` maps the id of each request sent in pipelined mode to the expected
+        response type, the future waiting for the response, and the deadline for the response"""
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self.socket_recoveries = 0
+        """The number of times the REQ socket has been recreated after a missing response"""
+        if pipelined:
+            # Wakes the pipelined loop when a request is queued, see TelemetryClient
+            wakeup_address = f"inproc://req-rep-wakeup-{uuid.uuid4().hex}"
+            self._wakeup_receiver = self._zmq_context.socket(zmq.PAIR)
+            self._wakeup_receiver.bind(wakeup_address)
+            self._wakeup_sender = self._zmq_context.socket(zmq.PAIR)
+            self._wakeup_sender.connect(wakeup_address)
+            self._wakeup_lock = threading.Lock()
+
+    def _wake_up(self):
+        """Wake the pipelined loop so it sends queued requests or notices the exit flag."""
+        with self._wakeup_lock:
+            if self._wakeup_sender.closed:
+                # The pipelined loop has already exited
+                return
+            try:
+                self._wakeup_sender.send(b"", zmq.NOBLOCK)
+            except zmq.Again:
+                # A wake-up message is already pending
+                pass
 
     @staticmethod
     def _get_client_info() -> blueye.protocol.ClientInfo:
@@ -473,40 +1067,231 @@ class ReqRepClient(threading.Thread):
 
     def run(self):
         """Run the request-reply client thread."""
+        try:
+            if self._pipelined:
+                self._run_pipelined()
+            else:
+                self._run_req()
+        finally:
+            self._close_sockets()
+
+    def _close_sockets(self):
+        """Close the sockets once the thread is done with them."""
+        self._socket.close(linger=0)
+        if self._pipelined:
+            self._wakeup_receiver.close(linger=0)
+            with self._wakeup_lock:
+                self._wakeup_sender.close(linger=0)
+
+    def _run_req(self):
+        """Send requests one at a time through the REQ socket."""
         while not self._exit_flag.is_set():
             try:
-                msg, response_type, response_callback_queue = self._requests_to_send.get(
+                msg, response_type, response_future, deadline = self._requests_to_send.get(
                     timeout=0.1
                 )
-                self._socket.send_multipart(
-                    [
-                        bytes(msg._pb.DESCRIPTOR.full_name, "utf-8"),
-                        msg.__class__.serialize(msg),
-                    ]
-                )
             except queue.Empty:
                 # No requests to send, so we can
                 continue
-            # TODO: Deal with timeout
-            resp = self._socket.recv_multipart()
+            if not response_future.set_running_or_notify_cancel():
+                # The request timed out before it was sent
+                continue
+            if time.monotonic() >= deadline:
+                # The deadline passed while the request was queued, so it is not sent at all,
+                # which would only leave the socket waiting for a response nobody waits for
+                response_future.set_exception(
+                    blueye.protocol.exceptions.ResponseTimeout(
+                        "No response received from drone before timeout"
+                    )
+                )
+                continue
+            self._socket.send_multipart(
+                [
+                    bytes(msg._pb.DESCRIPTOR.full_name, "utf-8"),
+                    msg.__class__.serialize(msg),
+                ]
+            )
+            resp = self._receive_response(deadline)
+            if resp is None and self._exit_flag.is_set():
+                # The client is shutting down, so there is no need for a working socket
+                response_future.set_exception(
+                    blueye.protocol.exceptions.ResponseTimeout(
+                        "The request client was stopped before a response was received"
+                    )
+                )
+                return
+            if resp is None:
+                response_future.set_exception(
+                    blueye.protocol.exceptions.ResponseTimeout(
+                        "No response received from drone before timeout"
+                    )
+                )
+                self._recreate_socket()
+                continue
             resp_deserialized = response_type.deserialize(resp[1])
-            response_callback_queue.put(resp_deserialized)
+            response_future.set_result(resp_deserialized)
+
+    def _receive_response(self, deadline: float) -> Optional[List[bytes]]:
+        """Wait for the response on the REQ socket.
+
+        Args:
+            deadline (float): The `time.monotonic` value to wait until.
+
+        Returns:
+            The response frames, or None if the deadline passed or the client was stopped.
+        """
+        while not self._exit_flag.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self._socket.poll(min(0.1, remaining) * 1000, zmq.POLLIN):
+                return self._socket.recv_multipart()
+        return None
+
+    def _recreate_socket(self):
+        """Replace the REQ socket after a missing response.
+
+        A REQ socket can not send a new request before it has received the response to the
+        previous one, so the only way to recover from a lost response is to close the socket and
+        connect a new one (the "lazy pirate" pattern).
+        """
+        logger.warning("No response from drone, recreating request socket")
+        self._socket.close(linger=0)
+        self._socket = self._zmq_context.socket(zmq.REQ)
+        self._socket.connect(f"tcp://{self._parent_drone._ip}:5556")
+        self.socket_recoveries += 1
+
+    def _run_pipelined(self):
+        """Send requests and receive responses through the DEALER socket."""
+        poller = zmq.Poller()
+        poller.register(self._socket, zmq.POLLIN)
+        poller.register(self._wakeup_receiver, zmq.POLLIN)
+
+        while not self._exit_flag.is_set():
+            events = dict(poller.poll(self._time_until_next_deadline()))
+            if self._wakeup_receiver in events:
+                self._drain_wakeup_socket()
+                self._send_queued_requests()
+            if self._socket in events:
+                self._receive_responses()
+            self._expire_pending_requests()
+
+    def _time_until_next_deadline(self) -> Optional[int]:
+        """Get the milliseconds until the first pending request times out, or None if there are
+        no pending requests."""
+        with self._pending_lock:
+            if not self._pending_requests:
+                return None
+            first_deadline = min(deadline for _, _, deadline in self._pending_requests.values())
+        return max(0, math.ceil((first_deadline - time.monotonic()) * 1000))
+
+    def _expire_pending_requests(self):
+        """Fail and forget the pending requests whose deadline has passed.
+
+        Requests are normally forgotten by `wait_for_response` when it times out, but a future that
+        is never waited on would otherwise be kept forever.
+        """
+        now = time.monotonic()
+        with self._pending_lock:
+            expired = [
+                request_id
+                for request_id, (_, _, deadline) in self._pending_requests.items()
+                if deadline <= now
+            ]
+            expired_futures = [self._pending_requests.pop(request_id)[1] for request_id in expired]
+        for response_future in expired_futures:
+            response_future.set_exception(
+                blueye.protocol.exceptions.ResponseTimeout(
+                    "No response received from drone before timeout"
+                )
+            )
+
+    def _drain_wakeup_socket(self):
+        while True:
+            try:
+                self._wakeup_receiver.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+
+    def _send_queued_requests(self):
+        """Send all queued requests, tagging each with a request id."""
+        while True:
+            try:
+                msg, response_type, response_future, deadline = self._requests_to_send.get_nowait()
+            except queue.Empty:
+                return
+            if not response_future.set_running_or_notify_cancel():
+                continue
+            request_id = next(self._request_ids).to_bytes(8, "big")
+            with self._pending_lock:
+                self._pending_requests[request_id] = (response_type, response_future, deadline)
+            self._socket.send_multipart(
+                [
+                    request_id,
+                    b"",
+                    bytes(msg._pb.DESCRIPTOR.full_name, "utf-8"),
+                    msg.__class__.serialize(msg),
+                ]
+            )
+
+    def _receive_responses(self):
+        """Receive all ready responses and hand them to the requests waiting for them."""
+        while True:
+            try:
+                resp = self._socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            request_id = resp[0]
+            with self._pending_lock:
+                pending = self._pending_requests.pop(request_id, None)
+            if pending is None:
+                logger.debug("Dropping response to a request that has timed out")
+                continue
+            response_type, response_future, _ = pending
+            response_future.set_result(response_type.deserialize(resp[-1]))
 
     def stop(self):
         """Stop the request-reply client thread."""
         self._exit_flag.set()
+        if self._pipelined:
+            self._wake_up()
 
-    def _send_request_get_response(
+    def send_request(
         self,
         request: proto.message.Message,
         expected_response: proto.message.Message,
         timeout: float,
-    ):
-        """Send a request and get the response.
+    ) -> concurrent.futures.Future:
+        """Queue a request without waiting for the response.
+
+        In pipelined mode several requests can be in flight at the same time, so waiting on the
+        futures of a batch of requests only costs a single round trip.
 
         Args:
             request (proto.message.Message): The request message.
             expected_response (proto.message.Message): The expected response message type.
+            timeout (float): Seconds from now until the request is given up. In REQ mode the socket
+                             is recreated if the response has not arrived by then, so that later
+                             requests are not blocked. In pipelined mode the request is forgotten,
+                             and the future fails with a ResponseTimeout.
+
+        Returns:
+            concurrent.futures.Future: A future that is resolved with the response message.
+        """
+        response_future = concurrent.futures.Future()
+        deadline = time.monotonic() + timeout
+        self._requests_to_send.put((request, expected_response, response_future, deadline))
+        if self._pipelined:
+            self._wake_up()
+        return response_future
+
+    def wait_for_response(
+        self, response_future: concurrent.futures.Future, timeout: float
+    ) -> proto.message.Message:
+        """Wait for the response to a request sent with `send_request`.
+
+        Args:
+            response_future (concurrent.futures.Future): The future returned by `send_request`.
             timeout (float): The timeout for the response.
 
         Returns:
@@ -515,15 +1300,42 @@ class ReqRepClient(threading.Thread):
         Raises:
             blueye.protocol.exceptions.ResponseTimeout: If no response is received before the timeout.
         """
-        response_queue = queue.Queue(maxsize=1)
-        self._requests_to_send.put((request, expected_response, response_queue))
         try:
-            return response_queue.get(timeout=timeout)
-        except queue.Empty:
+            return response_future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Stop the request from being sent if it is still queued, and forget it if it is in
+            # flight, so that a late response is dropped
+            response_future.cancel()
+            with self._pending_lock:
+                for request_id, (_, future, _) in list(self._pending_requests.items()):
+                    if future is response_future:
+                        del self._pending_requests[request_id]
             raise blueye.protocol.exceptions.ResponseTimeout(
                 "No response received from drone before timeout"
             )
 
+    def _send_request_get_response(
+        self,
+        request: proto.message.Message,
+        expected_response: proto.message.Message,
+        timeout: float,
+    ):
+        """Send a request and get the response.
+
+        Args:
+            request (proto.message.Message): The request message.
+            expected_response (proto.message.Message): The expected response message type.
+            timeout (float): The timeout for the response.
+
+        Returns:
+            proto.message.Message: The response message.
+
+        Raises:
+            blueye.protocol.exceptions.ResponseTimeout: If no response is received before the timeout.
+        """
+        response_future = self.send_request(request, expected_response, timeout)
+        return self.wait_for_response(response_future, timeout)
+
     def ping(self, timeout: float) -> blueye.protocol.PingRep:
         """Send a ping request to the drone.
 
@@ -16,3 +16,18 @@ class WaterDensities:
     fresh = 997.0
     brackish = 1011.0
     salty = 1025.0
+
+
+class CallbackOverflowPolicy:
+    """
+    What to do when the queue of a telemetry callback running in its own thread is full.
+
+    Attributes:
+        drop_oldest (str): Discard the oldest queued message to make room for the new one.
+        drop_newest (str): Discard the new message.
+        block (str): Wait for room in the queue. This will block the telemetry receive thread.
+    """
+
+    drop_oldest = "drop_oldest"
+    drop_newest = "drop_newest"
+    block = "block"
@@ -1,22 +1,27 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import concurrent.futures
 import logging
 import time
 from datetime import datetime
-from json import JSONDecodeError
-from typing import Any, Callable, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 
 import blueye.protocol
 import google.protobuf.any_pb2
 import proto
-import requests
 from packaging import version
 
 from .battery import Battery
 from .camera import Camera
-from .connection import CtrlClient, ReqRepClient, TelemetryClient, WatchdogPublisher
-from .constants import WaterDensities
+from .connection import (
+    CtrlClient,
+    ReqRepClient,
+    TelemetryClient,
+    TelemetryHistory,
+    WatchdogPublisher,
+)
+from .constants import CallbackOverflowPolicy, WaterDensities
 from .guestport import (
     GenericServo,
     Gripper,
@@ -30,7 +35,10 @@ from .guestport import (
 from .logs import LegacyLogs, Logs
 from .mission import Mission
 from .motion import Motion
-from .utils import deserialize_any_to_message, is_scalar_type
+from .utils import deserialize_any_to_message, is_scalar_type, request_drone_info
+
+if TYPE_CHECKING:
+    from .recorder import TelemetryRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -101,6 +109,7 @@ class Telemetry:
             parent_drone (Drone): The parent drone instance.
         """
         self._parent_drone = parent_drone
+        self._recorders: List[TelemetryRecorder] = []
 
     def set_msg_publish_frequency(self, msg: proto.message.Message, frequency: float):
         """Set the publishing frequency of a specific telemetry message.
@@ -127,12 +136,30 @@ class Telemetry:
         msg_filter: List[proto.message.Message],
         callback: Callable[[str, proto.message.Message], None],
         raw: bool = False,
+        read_only: bool = False,
+        run_in_thread: bool = False,
+        queue_size: int = 100,
+        overflow_policy: str = CallbackOverflowPolicy.drop_oldest,
+        max_rate_hz: Optional[float] = None,
+        every_nth: int = 1,
+        latest_only: bool = False,
+        raw_pb: bool = False,
         **kwargs: Dict[str, Any],
     ) -> str:
         """Register a telemetry message callback.
 
         The callback is called each time a message of the type is received.
 
+        By default the callback is called from the thread receiving the telemetry, so a slow
+        callback will delay all other callbacks. Set `run_in_thread` to call it from a dedicated
+        thread instead, with the messages waiting in a queue of size `queue_size`. Messages that do
+        not fit in the queue are handled according to `overflow_policy`, and the number of dropped
+        messages can be read with
+        [`get_dropped_messages`][blueye.sdk.drone.Telemetry.get_dropped_messages].
+
+        Consumers that do not need every message can use `max_rate_hz` or `every_nth` to skip
+        messages. Skipped messages are dropped before they are deserialized.
+
         Args:
             msg_filter (List[proto.message.Message]):
                 A list of message types to register the callback for. E.g.,
@@ -144,6 +171,34 @@ class Telemetry:
                 type name and the message object.
             raw (bool, optional):
                 Pass the raw data instead of the deserialized message to the callback function.
+            read_only (bool, optional):
+                Pass a read-only view of the deserialized message to the callback function. A
+                message is only deserialized once, and the same object is passed to every callback
+                registered for its type, so a callback that modifies the message will affect the
+                others. Use this option to guard against that.
+            run_in_thread (bool, optional):
+                Call the callback function from a dedicated thread.
+            queue_size (int, optional):
+                The maximum number of messages waiting for the callback when `run_in_thread` is
+                True.
+            overflow_policy (str, optional):
+                What to do with new messages when the queue is full. One of the policies in
+                [CallbackOverflowPolicy][blueye.sdk.constants.CallbackOverflowPolicy].
+            max_rate_hz (float, optional):
+                The maximum rate in Hz to call the callback at for each message type. Messages
+                arriving sooner than `1/max_rate_hz` seconds after the last one passed on are
+                skipped.
+            every_nth (int, optional):
+                Only call the callback for every n-th message of each type.
+            latest_only (bool, optional):
+                Call the callback from a dedicated thread that only keeps the most recent message,
+                dropping older ones if the callback has not caught up. Overrides `run_in_thread`,
+                `queue_size` and `overflow_policy`.
+            raw_pb (bool, optional):
+                Pass the underlying protobuf message (eg. `blueye.protocol.DepthTel.pb()`) instead
+                of the proto-plus message. Field access on the protobuf message is considerably
+                faster, which matters for callbacks on high rate messages. Cannot be combined with
+                `read_only`.
             **kwargs:
                 Additional keyword arguments to pass to the callback function.
 
@@ -151,7 +206,18 @@ class Telemetry:
             The UUID of the callback.
         """
         uuid_hex = self._parent_drone._telemetry_watcher.add_callback(
-            msg_filter, callback, raw, **kwargs
+            msg_filter,
+            callback,
+            raw,
+            read_only,
+            run_in_thread,
+            queue_size,
+            overflow_policy,
+            max_rate_hz,
+            every_nth,
+            latest_only,
+            raw_pb,
+            **kwargs,
         )
         return uuid_hex
 
@@ -163,8 +229,91 @@ class Telemetry:
         """
         self._parent_drone._telemetry_watcher.remove_callback(callback_id)
 
+    def get_dropped_messages(self, callback_id: str) -> int:
+        """Get the number of messages a callback has missed because its queue was full.
+
+        Only callbacks registered with `run_in_thread=True` can drop messages.
+
+        Args:
+            callback_id (str): The callback ID from when the callback was registered.
+
+        Returns:
+            The number of dropped messages.
+        """
+        return self._parent_drone._telemetry_watcher.get_dropped_messages(callback_id)
+
+    def attach_recorder(self, recorder: TelemetryRecorder):
+        """Start recording telemetry messages with a recorder.
+
+        The recorder is detached when the drone is disconnected, and has to be attached again
+        after reconnecting. Call `recorder.detach()` to stop recording.
+
+        Args:
+            recorder (TelemetryRecorder): The recorder to attach.
+        """
+        recorder.attach(self._parent_drone._telemetry_watcher)
+        self._recorders.append(recorder)
+
+    def _detach_recorders(self):
+        """Detach the recorders attached with `attach_recorder`, keeping their data."""
+        for recorder in self._recorders:
+            recorder.detach()
+        self._recorders = []
+
+    def enable_history(self, msg_type: proto.message.Message, max_messages: int = 1000):
+        """Keep a history of the latest received messages of the specified type.
+
+        The messages are stored serialized in a ring buffer of fixed size, together with the time
+        they were received, and can be read with [`history`][blueye.sdk.drone.Telemetry.history].
+        The history is cleared when the drone is disconnected.
+
+        Args:
+            msg_type (proto.message.Message):
+                The message type to keep history for. E.g., blueye.protocol.DepthTel.
+            max_messages (int, optional):
+                The number of messages to keep. Choose it from the publishing frequency of the
+                message and the time span needed, e.g. 10 seconds of a 100 Hz message needs 1000.
+        """
+        self._parent_drone._telemetry_watcher.enable_history(msg_type, max_messages)
+
+    def disable_history(self, msg_type: proto.message.Message):
+        """Stop keeping a history of the specified message type.
+
+        Args:
+            msg_type (proto.message.Message): The message type to stop keeping history for.
+        """
+        self._parent_drone._telemetry_watcher.disable_history(msg_type)
+
+    def history(
+        self, msg_type: proto.message.Message, seconds: Optional[float] = None, raw_pb=False
+    ) -> TelemetryHistory:
+        """Get the stored history of the specified message type.
+
+        History has to be enabled for the message type with
+        [`enable_history`][blueye.sdk.drone.Telemetry.enable_history] first.
+
+        Args:
+            msg_type (proto.message.Message):
+                The message type to get the history of. E.g., blueye.protocol.DepthTel.
+            seconds (float, optional):
+                Only include the messages received during the last `seconds` seconds. All stored
+                messages are included if not set.
+            raw_pb (bool, optional):
+                If True, the messages are returned as the underlying protobuf messages instead of
+                proto-plus messages.
+
+        Returns:
+            A sequence of `(timestamp, message)` tuples, oldest first, where the timestamp is the
+            time the message was received in seconds since the epoch. The messages are only
+            deserialized when they are accessed.
+
+        Raises:
+            KeyError: If history is not enabled for the message type.
+        """
+        return self._parent_drone._telemetry_watcher.get_history(msg_type, seconds, raw_pb)
+
     def get(
-        self, msg_type: proto.message.Message, deserialize=True
+        self, msg_type: proto.message.Message, deserialize=True, raw_pb=False
     ) -> Optional[proto.message.Message | bytes]:
         """Get the latest telemetry message of the specified type.
 
@@ -174,21 +323,29 @@ class Telemetry:
             deserialize (bool, optional):
                 If True, the message will be deserialized before being returned. If False, the raw
                 bytes will be returned.
+            raw_pb (bool, optional):
+                If True, the deserialized message is returned as the underlying protobuf message
+                instead of the proto-plus message. Field access is faster on the protobuf message.
 
         Returns:
             The latest message of the specified type, or None if no message has been received yet.
+            Deserialized messages are cached until a new message of the same type is received, and
+            the same object may be returned to several callers, so it should not be modified.
         """
         try:
-            msg = self._parent_drone._telemetry_watcher.get(msg_type)
-        except KeyError:
-            if version.parse(self._parent_drone.software_version_short) >= version.parse("3.3"):
-                msg = self._parent_drone._req_rep_client.get_telemetry_msg(msg_type).payload.value
-                if msg == b"":
-                    return None
+            if deserialize:
+                return self._parent_drone._telemetry_watcher.get_deserialized(msg_type, raw_pb)
             else:
-                return None
+                return self._parent_drone._telemetry_watcher.get(msg_type)
+        except KeyError:
+            pass
+        if version.parse(self._parent_drone.software_version_short) < version.parse("3.3"):
+            return None
+        msg = self._parent_drone._req_rep_client.get_telemetry_msg(msg_type).payload.value
+        if msg == b"":
+            return None
         if deserialize:
-            return msg_type.deserialize(msg)
+            return msg_type.pb().FromString(msg) if raw_pb else msg_type.deserialize(msg)
         else:
             return msg
 
@@ -280,26 +437,12 @@ class Drone:
         Raises:
             ConnectionError: If the connection to the drone could not be established.
         """
-        try:
-            response = requests.get(
-                f"http://{self._ip}/diagnostics/drone_info", timeout=timeout
-            ).json()
-        except (
-            requests.ConnectTimeout,
-            requests.ReadTimeout,
-            requests.ConnectionError,
-            JSONDecodeError,
-        ) as e:
-            raise ConnectionError("Could not establish connection with drone") from e
-        try:
-            self.features = list(filter(None, response["features"].split(",")))
-        except KeyError:
-            # Drone versions older than 1.4.7 did not have this field.
-            self.features = []
-        self.software_version = response["sw_version"]
-        self.software_version_short = self.software_version.split("-")[0]
-        self.serial_number = response["serial_number"]
-        self.uuid = response["hardware_id"]
+        drone_info = request_drone_info(self._ip, timeout)
+        self.features = drone_info.features
+        self.software_version = drone_info.software_version
+        self.software_version_short = drone_info.software_version_short
+        self.serial_number = drone_info.serial_number
+        self.uuid = drone_info.uuid
 
     @staticmethod
     def _drone_info_callback(msg_type: str, msg: blueye.protocol.DroneInfoTel, drone: Drone):
@@ -365,6 +508,7 @@ class Drone:
         disconnect_other_clients: bool = False,
         connect_as_observer: bool = False,
         log_notifications: bool = False,
+        fast_connect: bool = False,
     ):
         """Establish a connection to the drone.
 
@@ -375,6 +519,13 @@ class Drone:
         from moving unexpectedly when connecting, all thruster set points are set to zero when
         connecting.
 
+        With `fast_connect` the drone info is requested over HTTP while the ZeroMQ sockets are set
+        up, the ping and connect requests are sent without waiting for each other through a
+        pipelined [ReqRepClient][blueye.sdk.connection.ReqRepClient], and the control and watchdog
+        threads are not started until the client is connected.
+
+        The time spent in each phase of the connection is stored in `connection_timings`.
+
         Args:
             client_info (blueye.protocol.ClientInfo, optional):
                 Information about the client connecting. If None, the SDK will attempt to read it
@@ -387,33 +538,22 @@ class Drone:
                 If True, the client will not be promoted to in control of the drone.
             log_notifications (bool, optional):
                 If True, the notifications will be logged using the logging module.
+            fast_connect (bool, optional):
+                If True, overlap the steps of the connection handshake to reduce the time it takes
+                to connect.
 
         Raises:
             ConnectionError: If the connection attempt fails.
             RuntimeError: If the Blunux version of the connected drone is too old.
         """
         logger.info(f"Attempting to connect to drone at {self._ip}")
-        time_connection_start = time.time()
-        self._update_drone_info(timeout=timeout)
-        self._verify_required_blunux_version("3.2")
-
-        self._telemetry_watcher = TelemetryClient(self)
-        self._ctrl_client = CtrlClient(self)
-        self._watchdog_publisher = WatchdogPublisher(self)
-        self._req_rep_client = ReqRepClient(self)
-
-        self._telemetry_watcher.start()
-        self._req_rep_client.start()
-        self._ctrl_client.start()
-        self._watchdog_publisher.start()
-
-        try:
-            self.ping()
-            connect_resp = self._req_rep_client.connect_client(
-                client_info=client_info, is_observer=connect_as_observer
-            )
-        except blueye.protocol.exceptions.ResponseTimeout as e:
-            raise ConnectionError("Could not establish connection with drone") from e
+        self.connection_timings: Dict[str, float] = {}
+        time_connection_start = time.perf_counter()
+        if fast_connect:
+            connect_resp = self._connect_overlapped(client_info, timeout, connect_as_observer)
+        else:
+            connect_resp = self._connect_sequential(client_info, timeout, connect_as_observer)
+        phase_start = time.perf_counter()
         logger.info(f"Connection successful, client id: {connect_resp.client_id}")
         logger.info(f"Client id in control: {connect_resp.client_id_in_control}")
         logger.info(f"There are {len(connect_resp.connected_clients)-1} other clients connected")
@@ -458,7 +598,152 @@ class Drone:
             self.config.set_drone_time(current_time)
             logger.debug("Disabling thrusters")
             self.motion.send_thruster_setpoint(0, 0, 0, 0)
-        logger.debug("Connected in {:.2f} seconds".format(time.time() - time_connection_start))
+        self.connection_timings["post_connect"] = time.perf_counter() - phase_start
+        self.connection_timings["total"] = time.perf_counter() - time_connection_start
+        logger.debug(
+            "Connected in {:.2f} seconds ({})".format(
+                self.connection_timings["total"],
+                ", ".join(
+                    f"{phase}: {duration:.3f} s"
+                    for phase, duration in self.connection_timings.items()
+                    if phase != "total"
+                ),
+            )
+        )
+
+    def _connect_sequential(
+        self,
+        client_info: Optional[blueye.protocol.ClientInfo],
+        timeout: float,
+        connect_as_observer: bool,
+    ) -> blueye.protocol.ConnectClientRep:
+        """Run the connection handshake one step at a time.
+
+        Returns:
+            The connect client response.
+        """
+        phase_start = time.perf_counter()
+        self._update_drone_info(timeout=timeout)
+        self._verify_required_blunux_version("3.2")
+        self.connection_timings["drone_info"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        self._telemetry_watcher = TelemetryClient(self)
+        self._ctrl_client = CtrlClient(self)
+        self._watchdog_publisher = WatchdogPublisher(self)
+        self._req_rep_client = ReqRepClient(self)
+
+        self._telemetry_watcher.start()
+        self._req_rep_client.start()
+        self._ctrl_client.start()
+        self._watchdog_publisher.start()
+        self.connection_timings["start_clients"] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        try:
+            self.ping()
+            connect_resp = self._req_rep_client.connect_client(
+                client_info=client_info, is_observer=connect_as_observer
+            )
+        except blueye.protocol.exceptions.ResponseTimeout as e:
+            raise ConnectionError("Could not establish connection with drone") from e
+        self.connection_timings["handshake"] = time.perf_counter() - phase_start
+        return connect_resp
+
+    def _connect_overlapped(
+        self,
+        client_info: Optional[blueye.protocol.ClientInfo],
+        timeout: float,
+        connect_as_observer: bool,
+    ) -> blueye.protocol.ConnectClientRep:
+        """Run the connection handshake with the independent steps overlapping.
+
+        The HTTP request for drone info runs in a separate thread while the ZeroMQ clients are set
+        up, and the ping and connect requests are in flight at the same time. The control and
+        watchdog threads are started last, once the client id is known.
+
+        Returns:
+            The connect client response.
+        """
+
+        def timed_update_drone_info():
+            phase_start = time.perf_counter()
+            self._update_drone_info(timeout=timeout)
+            self.connection_timings["drone_info"] = time.perf_counter() - phase_start
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        connect_resp = None
+        try:
+            drone_info_future = executor.submit(timed_update_drone_info)
+
+            phase_start = time.perf_counter()
+            self._telemetry_watcher = TelemetryClient(self)
+            self._req_rep_client = ReqRepClient(self, pipelined=True)
+            self._telemetry_watcher.start()
+            self._req_rep_client.start()
+            self.connection_timings["start_clients"] = time.perf_counter() - phase_start
+
+            phase_start = time.perf_counter()
+            ping_future = executor.submit(self.ping)
+            try:
+                # The ping is only a readiness check, so the connect request gets the same timeout
+                connect_resp = self._req_rep_client.connect_client(
+                    client_info=client_info, is_observer=connect_as_observer, timeout=1.0
+                )
+                ping_future.result()
+                handshake_error = None
+            except blueye.protocol.exceptions.ResponseTimeout as e:
+                handshake_error = e
+            self.connection_timings["handshake"] = time.perf_counter() - phase_start
+
+            # Unsupported drone versions should be reported as such, even if the handshake failed
+            drone_info_future.result()
+            self._verify_required_blunux_version("3.2")
+            if handshake_error is not None:
+                raise ConnectionError(
+                    "Could not establish connection with drone"
+                ) from handshake_error
+        except BaseException:
+            if connect_resp is not None:
+                # The connect request is sent before the drone info is checked, so the drone has
+                # to be told to forget the client again
+                try:
+                    self._req_rep_client.disconnect_client(connect_resp.client_id)
+                except blueye.protocol.exceptions.ResponseTimeout:
+                    logger.warning(
+                        f"Could not disconnect client {connect_resp.client_id} after failed connect"
+                    )
+            self._stop_clients()
+            raise
+        finally:
+            executor.shutdown(wait=False)
+
+        phase_start = time.perf_counter()
+        # The client id is known at this point, so the watchdog messages are correct from the start
+        self.client_id = connect_resp.client_id
+        self._ctrl_client = CtrlClient(self)
+        self._watchdog_publisher = WatchdogPublisher(self)
+        self._ctrl_client.start()
+        self._watchdog_publisher.start()
+        self.connection_timings["start_control"] = time.perf_counter() - phase_start
+        return connect_resp
+
+    def _stop_clients(self):
+        """Stop the connection threads and replace them with placeholders."""
+        self.telemetry._detach_recorders()
+        for client in (
+            self._watchdog_publisher,
+            self._telemetry_watcher,
+            self._req_rep_client,
+            self._ctrl_client,
+        ):
+            if not isinstance(client, _NoConnectionClient):
+                client.stop()
+
+        self._watchdog_publisher = _NoConnectionClient()
+        self._telemetry_watcher = _NoConnectionClient()
+        self._req_rep_client = _NoConnectionClient()
+        self._ctrl_client = _NoConnectionClient()
 
     def disconnect(self):
         """Disconnects the connection, allowing another client to take control of the drone."""
@@ -468,16 +753,7 @@ class Drone:
             # If there's no response the connection is likely already closed, so we can just
             # continue to stop threads and disconnect
             pass
-        self._watchdog_publisher.stop()
-        self._telemetry_watcher.stop()
-        self._req_rep_client.stop()
-        self._ctrl_client.stop()
-
-        self._watchdog_publisher = _NoConnectionClient()
-        self._telemetry_watcher = _NoConnectionClient()
-        self._req_rep_client = _NoConnectionClient()
-        self._ctrl_client = _NoConnectionClient()
-
+        self._stop_clients()
         self.connected = False
 
     @property
@@ -491,7 +767,10 @@ class Drone:
         if clients_tel is None:
             return None
         else:
-            return list(clients_tel.connected_clients)
+            # The telemetry message is cached and shared, so the caller gets copies to modify
+            return [
+                blueye.protocol.ConnectedClient(client) for client in clients_tel.connected_clients
+            ]
 
     @property
     def client_in_control(self) -> Optional[int]:
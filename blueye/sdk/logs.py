@@ -1,24 +1,33 @@
 from __future__ import annotations
 
+import array
+import concurrent.futures
 import io
 import logging
+import mmap
+import os
+import threading
+import time
 import zlib
+from collections import deque
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Callable, Iterator, List, Optional, Tuple
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 import blueye.protocol as bp
 import dateutil.parser
 import proto
 import requests
 import tabulate
-from google.protobuf.internal.decoder import _DecodeVarint as decodeVarint
 from packaging import version
+from proto.datetime_helpers import DatetimeWithNanoseconds
 
-from .utils import deserialize_any_to_message
+from .utils import deserialize_any_to_message, message_descriptor, scalar_field_accessors
 
 logger = logging.getLogger(__name__)
 
+_BinlogRecordPb = bp.BinlogRecord.pb()
+
 
 def human_readable_filesize(binsize: int) -> str:
     """Convert bytes to human readable string"""
@@ -37,87 +46,215 @@ def is_gzip_compressed(data: bytes) -> bool:
 
 
 class StreamingDecompressor:
-    """A streaming decompressor that handles gzip data incrementally"""
+    """A streaming decompressor that handles gzip data incrementally
+
+    The compressed input is consumed through a memoryview, so any object supporting the buffer
+    protocol (bytes, bytearray, mmap, ...) can be passed without being copied. Decompressed
+    blocks are kept as they come out of zlib, and reads are served by tracking an offset into the
+    oldest block. A read that fits within one block returns a memoryview into it without copying;
+    only reads spanning several blocks are joined.
 
-    def __init__(self, compressed_data: bytes):
-        self.compressed_data = compressed_data
+    *Arguments*:
+
+    * `compressed_data`:
+        The gzip compressed data. Data without a gzip header is passed through unchanged.
+    * `chunk_size`:
+        Number of compressed bytes fed to the decompressor at a time
+    """
+
+    def __init__(self, compressed_data, chunk_size: int = 1 << 16):
+        self.compressed_data = memoryview(compressed_data).cast("B")
         self.compressed_pos = 0
+        self.chunk_size = chunk_size
         self.decompressor = None
-        self.decompressed_buffer = bytearray()
+        self._blocks: Deque[bytes] = deque()
+        self._block_pos = 0  # Read offset into the first block
+        self._available = 0  # Unread bytes across all blocks
         self.eof = False
 
-        if is_gzip_compressed(compressed_data):
+        if is_gzip_compressed(self.compressed_data):
             # Initialize zlib decompressor for gzip data
             self.decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
         else:
-            # Data is not compressed
-            self.decompressed_buffer = bytearray(compressed_data)
+            # Data is not compressed, serve it directly from the input
+            self._append_block(self.compressed_data)
             self.eof = True
 
-    def read(self, size: int) -> bytes:
-        """Read up to size bytes from the decompressed stream"""
-        if self.eof and len(self.decompressed_buffer) == 0:
-            return b""
-
-        # If we need more decompressed data and we're not at EOF
-        while len(self.decompressed_buffer) < size and not self.eof:
-            # Read a chunk from compressed data
-            chunk_size = min(8192, len(self.compressed_data) - self.compressed_pos)
-            if chunk_size == 0:
-                # No more compressed data
-                if self.decompressor:
-                    # Finalize decompression. This can fail on corrupted data.
-                    try:
-                        final_data = self.decompressor.flush()
-                        self.decompressed_buffer.extend(final_data)
-                    except zlib.error as e:
-                        logger.warning(
-                            f"Decompression flush failed, likely due to corrupted data: {e}"
-                        )
-                    except (MemoryError, OverflowError) as e:
-                        logger.error(f"Decompression flush failed due to resource limits: {e}")
-                    except Exception as e:
-                        logger.error(f"Unexpected error during decompression flush: {e}")
-                self.eof = True
-                break
-
-            chunk = self.compressed_data[self.compressed_pos : self.compressed_pos + chunk_size]
-            self.compressed_pos += chunk_size
+    def _append_block(self, block):
+        if len(block) > 0:
+            self._blocks.append(block)
+            self._available += len(block)
 
+    def _decompress_next_chunk(self):
+        """Feed the next chunk of compressed data to the decompressor"""
+        chunk_size = min(self.chunk_size, len(self.compressed_data) - self.compressed_pos)
+        if chunk_size == 0:
+            # No more compressed data
             if self.decompressor:
+                # Finalize decompression. This can fail on corrupted data.
                 try:
-                    decompressed_chunk = self.decompressor.decompress(chunk)
-                    self.decompressed_buffer.extend(decompressed_chunk)
+                    self._append_block(self.decompressor.flush())
                 except zlib.error as e:
-                    # If decompression fails, we're probably done. This can happen with
-                    # truncated or corrupted files.
-                    logger.warning(f"Decompression of chunk failed: {e}")
-                    self.eof = True
-                    break
+                    logger.warning(f"Decompression flush failed, likely due to corrupted data: {e}")
                 except (MemoryError, OverflowError) as e:
-                    logger.error(f"Decompression failed due to resource limits: {e}")
-                    self.eof = True
-                    break
+                    logger.error(f"Decompression flush failed due to resource limits: {e}")
                 except Exception as e:
-                    logger.error(f"Unexpected error during decompression: {e}")
-                    self.eof = True
-                    break
+                    logger.error(f"Unexpected error during decompression flush: {e}")
+            self.eof = True
+            return
+
+        chunk = self.compressed_data[self.compressed_pos : self.compressed_pos + chunk_size]
+        self.compressed_pos += chunk_size
+
+        try:
+            self._append_block(self.decompressor.decompress(chunk))
+        except zlib.error as e:
+            # If decompression fails, we're probably done. This can happen with
+            # truncated or corrupted files.
+            logger.warning(f"Decompression of chunk failed: {e}")
+            self.eof = True
+        except (MemoryError, OverflowError) as e:
+            logger.error(f"Decompression failed due to resource limits: {e}")
+            self.eof = True
+        except Exception as e:
+            logger.error(f"Unexpected error during decompression: {e}")
+            self.eof = True
+
+    def read(self, size: int) -> memoryview:
+        """Read up to size bytes from the decompressed stream
+
+        The returned memoryview stays valid after later reads, but should be converted with
+        `bytes()` if it is kept around, as it holds on to the whole decompressed block.
+        """
+        while self._available < size and not self.eof:
+            self._decompress_next_chunk()
+
+        result_size = min(size, self._available)
+        if result_size == 0:
+            return memoryview(b"")
+
+        first = self._blocks[0]
+        start = self._block_pos
+        if len(first) - start >= result_size:
+            # The read fits within the first block, no copy needed
+            result = memoryview(first)[start : start + result_size]
+            self._consume(result_size)
+            return result
+
+        # The read spans several blocks, join the parts into a new buffer
+        result = bytearray()
+        remaining = result_size
+        while remaining > 0:
+            first = self._blocks[0]
+            start = self._block_pos
+            part_size = min(remaining, len(first) - start)
+            result += memoryview(first)[start : start + part_size]
+            self._consume(part_size)
+            remaining -= part_size
+        return memoryview(result)
+
+    def _consume(self, size: int):
+        """Advance the read offset, releasing the first block when it is fully read"""
+        self._available -= size
+        self._block_pos += size
+        if self._block_pos == len(self._blocks[0]):
+            self._blocks.popleft()
+            self._block_pos = 0
+
+
+def _decode_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Decode a varint from data at pos, returns the value and the position after it"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+        if shift >= 70:
+            raise ValueError("Malformed varint")
+
+
+def _find_length_delimited_field(data: bytes, field_number: int, start: int, end: int):
+    """Find a length delimited field in a serialized message without parsing the whole message
+
+    *Returns*:
+
+    The start and end position of the field contents, or None if the field is not present
+    """
+    pos = start
+    while pos < end:
+        tag, pos = _decode_varint(data, pos)
+        wire_type = tag & 0x7
+        if wire_type == 2:
+            length, pos = _decode_varint(data, pos)
+            if tag >> 3 == field_number:
+                return pos, pos + length
+            pos += length
+        elif wire_type == 0:
+            _, pos = _decode_varint(data, pos)
+        elif wire_type == 1:
+            pos += 8
+        elif wire_type == 5:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+    return None
 
-        # Return requested amount of data
-        result_size = min(size, len(self.decompressed_buffer))
-        result = bytes(self.decompressed_buffer[:result_size])
-        self.decompressed_buffer = self.decompressed_buffer[result_size:]
 
-        return result
+def _payload_type_url(record_data: bytes) -> Optional[bytes]:
+    """Read the type URL of the payload of a serialized BinlogRecord
+
+    *Returns*:
+
+    The type URL, or None if it could not be found
+    """
+    try:
+        payload = _find_length_delimited_field(record_data, 1, 0, len(record_data))
+        if payload is None:
+            return None
+        type_url = _find_length_delimited_field(record_data, 1, *payload)
+    except (ValueError, IndexError):
+        return None
+    if type_url is None:
+        return None
+    return record_data[type_url[0] : type_url[1]]
+
+
+def _type_urls(types: Iterable[proto.message.MessageMeta]) -> Set[bytes]:
+    return {
+        f"type.googleapis.com/{message_descriptor(msg_type).full_name}".encode()
+        for msg_type in types
+    }
 
 
 class LogStream:
     """Class for streaming a log
 
     Creates a stream from a downloaded log file. Iterate over the object to get the next log record.
+
+    The stream is read in blocks of `read_size` bytes, and the records are framed directly from
+    the buffered block instead of reading the length prefix of each record byte by byte.
+
+    If `types` is given, only records with those message types are returned. The type of each
+    record is read from the serialized data, so the other records are skipped without being
+    deserialized.
+
+    If `raw_pb` is True, the messages are returned as the underlying protobuf messages instead of
+    the proto-plus wrappers from blueye.protocol. Field access is considerably faster on the
+    protobuf messages, which matters when processing large logs.
     """
 
-    def __init__(self, log: bytes, decompress: bool = True) -> Iterator[
+    def __init__(
+        self,
+        log: bytes,
+        decompress: bool = True,
+        read_size: int = 1 << 16,
+        types: Optional[Iterable[proto.message.MessageMeta]] = None,
+        raw_pb: bool = False,
+    ) -> Iterator[
         Tuple[
             proto.datetime_helpers.DatetimeWithNanoseconds,  # Real time clock
             timedelta,  # Time since first message
@@ -127,63 +264,404 @@ class LogStream:
     ]:
         if decompress:
             self.stream = StreamingDecompressor(log)
+        elif isinstance(log, mmap.mmap):
+            # A memory map can be read from directly without copying it into memory first
+            self.stream = log
         else:
             self.stream = io.BytesIO(log)
 
         self.start_monotonic: proto.datetime_helpers.DatetimeWithNanoseconds = 0
+        self._read_size = read_size
+        self._buffer = bytearray()
+        self._buffer_pos = 0
+        self._stream_exhausted = False
+        self._type_urls = _type_urls(types) if types is not None else None
+        self._raw_pb = raw_pb
+
+    @classmethod
+    def from_path(
+        cls,
+        path: Path | str,
+        decompress: bool = True,
+        types: Optional[Iterable[proto.message.MessageMeta]] = None,
+        raw_pb: bool = False,
+    ) -> LogStream:
+        """Create a stream from a log file on disk
+
+        The file is memory mapped instead of read into memory, so only the parts currently being
+        parsed need to be resident. This makes it possible to parse logs larger than the
+        available memory.
+
+        *Arguments*:
+
+        * `path`:
+            Path to the log file
+        * `decompress`:
+            If True, the file is decompressed while parsing. Set to False if the log file has
+            already been decompressed.
+        * `types`:
+            Only return records with these message types. All records are returned if `None`.
+        * `raw_pb`:
+            Return the underlying protobuf messages instead of the proto-plus wrappers
+
+        *Returns*:
+
+        A `LogStream` object
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files cannot be memory mapped
+                return cls(b"", decompress, types=types, raw_pb=raw_pb)
+            # The map stays valid after the file is closed
+            log = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(log, decompress, types=types, raw_pb=raw_pb)
+
+    def to_columns(
+        self, types: Optional[Iterable[proto.message.MessageMeta]] = None
+    ) -> Dict[proto.message.MessageMeta, Dict[str, "numpy.ndarray"]]:
+        """Collect the remaining records of the stream into columns of NumPy arrays
+
+        Creates one table for each message type, with a column for each scalar field of the
+        message. Nested fields are named by joining the field names with dots, eg.
+        `imu.gyroscope.x`, and repeated fields are left out. Each table also has the columns
+        `unix_timestamp` (seconds since the epoch) and `time_since_start` (seconds since the first
+        record in the log).
+
+        Requires NumPy to be installed.
+
+        *Arguments*:
+
+        * `types`:
+            Message types to collect, eg. `[bp.DepthTel, bp.Imu1Tel]`. Every type in the log is
+            collected if `None`.
+
+        *Returns*:
+
+        A dictionary mapping each message type to a dictionary of column name and array
+        """
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                "LogStream.to_columns requires NumPy, install it with `pip install numpy`"
+            ) from e
+
+        builders: Dict[proto.message.MessageMeta, _ColumnBuilder] = {}
+        type_urls = self._type_urls
+        if types is not None:
+            builders = {msg_type: _ColumnBuilder(msg_type) for msg_type in types}
+            type_urls = _type_urls(types) if type_urls is None else type_urls & _type_urls(types)
+        while True:
+            try:
+                unix_timestamp, time_since_start, payload_type, payload_msg = self._next_record(
+                    type_urls, raw_pb=True
+                )
+            except StopIteration:
+                break
+            builder = builders.get(payload_type)
+            if builder is None:
+                builder = builders[payload_type] = _ColumnBuilder(payload_type)
+            builder.append(
+                unix_timestamp.timestamp(), time_since_start.total_seconds(), payload_msg
+            )
+        return {msg_type: builder.to_numpy(numpy) for msg_type, builder in builders.items()}
 
     def __iter__(self):
         return self
 
-    def __next__(self):
-        # Try to read the varint that indicates message size
-        try:
-            # Read bytes one by one until we have a complete varint
-            varint_bytes = bytearray()
-            while True:
-                byte_data = self.stream.read(1)  # Read one byte at a time
-                if not byte_data:
-                    raise StopIteration  # End of stream
-                varint_bytes.append(byte_data[0])  # Add byte to our varint buffer
-
-                # Check if this is the last byte of the varint (MSB is 0)
-                if byte_data[0] < 0x80:  # 0x80 = 128 = 10000000 binary
-                    break  # MSB is 0, so we're done
-
-                # Prevent infinite loop with malformed data
-                if len(varint_bytes) > 10:  # Max varint size for 64-bit
+    def _fill_buffer(self, min_available: int) -> bool:
+        """Read from the stream until at least `min_available` unread bytes are buffered
+
+        *Returns*:
+
+        False if the stream ended before enough bytes were available
+        """
+        while len(self._buffer) - self._buffer_pos < min_available:
+            if self._stream_exhausted:
+                return False
+            if self._buffer_pos > 0:
+                # Drop the consumed bytes before growing the buffer
+                del self._buffer[: self._buffer_pos]
+                self._buffer_pos = 0
+            missing = min_available - len(self._buffer)
+            chunk = self.stream.read(max(self._read_size, missing))
+            if not chunk:
+                self._stream_exhausted = True
+                return False
+            self._buffer += chunk
+        return True
+
+    def _next_record_data(self) -> bytes:
+        """Frame the next length-prefixed record from the buffer
+
+        *Returns*:
+
+        The serialized BinlogRecord
+        """
+        # A varint is at most 10 bytes, anything less means we are at the end of the stream
+        self._fill_buffer(10)
+        buffer = self._buffer
+        start = self._buffer_pos
+        end = min(len(buffer), start + 10)
+        msg_size = 0
+        shift = 0
+        pos = start
+        while True:
+            if pos >= end:
+                if end - start >= 10:
                     logger.error("Malformed varint detected")
-                    raise StopIteration
+                raise StopIteration  # End of stream, or incomplete varint
+            byte = buffer[pos]
+            pos += 1
+            msg_size |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
 
-            # Use Google's protobuf decoder to decode the varint
-            msg_size, _ = decodeVarint(bytes(varint_bytes), 0)
+        header_size = pos - start
+        if not self._fill_buffer(header_size + msg_size):
+            raise StopIteration  # Incomplete message
+        data_start = self._buffer_pos + header_size
+        data_end = data_start + msg_size
+        msg_data = bytes(self._buffer[data_start:data_end])
+        self._buffer_pos = data_end
+        return msg_data
 
-            # Read the message data
-            msg_data = self.stream.read(msg_size)
-            if len(msg_data) < msg_size:
+    def __next__(self):
+        return self._next_record(self._type_urls, self._raw_pb)
+
+    def _next_record(self, type_urls: Optional[Set[bytes]], raw_pb: bool):
+        while True:
+            try:
+                msg_data = self._next_record_data()
+            except (ValueError, IOError) as e:
+                logger.error(f"Error reading log stream: {e}")
                 raise StopIteration
 
-        except (ValueError, IOError) as e:
-            logger.error(f"Error reading log stream: {e}")
-            raise StopIteration
+            # The first record is always decoded, as the time since start is relative to it
+            if type_urls is not None and self.start_monotonic != 0:
+                type_url = _payload_type_url(msg_data)
+                if type_url is not None and type_url not in type_urls:
+                    continue
 
-        try:
-            msg = bp.BinlogRecord.deserialize(msg_data)
-            payload_type, payload_msg_deserialized = deserialize_any_to_message(msg.payload)
-        except Exception as e:
-            logger.error(f"Failed to deserialize payload: {e}")
-            return self.__next__()  # Skip this message and continue with the next
+            try:
+                # The record is only a container, so it is decoded without the proto-plus wrapper
+                msg = _BinlogRecordPb.FromString(msg_data)
+                clock_monotonic = DatetimeWithNanoseconds.from_timestamp_pb(msg.clock_monotonic)
+                if self.start_monotonic == 0:
+                    self.start_monotonic = clock_monotonic
+                if type_urls is not None and msg.payload.type_url.encode() not in type_urls:
+                    continue
+                payload_type, payload_msg_deserialized = deserialize_any_to_message(
+                    msg.payload, raw_pb
+                )
+            except Exception as e:
+                logger.error(f"Failed to deserialize payload: {e}")
+                continue  # Skip this message and continue with the next
+            break
 
-        if self.start_monotonic == 0:
-            self.start_monotonic = msg.clock_monotonic
         return (
-            msg.unix_timestamp,
-            msg.clock_monotonic - self.start_monotonic,
+            DatetimeWithNanoseconds.from_timestamp_pb(msg.unix_timestamp),
+            clock_monotonic - self.start_monotonic,
             payload_type,
             payload_msg_deserialized,
         )
 
 
+class _BandwidthLimiter:
+    """Caps the combined rate of data received by several threads"""
+
+    def __init__(self, max_bytes_per_second: float):
+        self._seconds_per_byte = 1 / max_bytes_per_second
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def consume(self, size: int):
+        """Block until `size` more bytes can be received without exceeding the cap"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + size * self._seconds_per_byte
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LogDownloadSummary(NamedTuple):
+    """Result of downloading several logs with `Logs.download_all`"""
+
+    downloaded: List[Path]
+    skipped: List[Path]
+    failed: Dict[str, Exception]
+    bytes_downloaded: int
+    duration: float
+
+    @property
+    def throughput(self) -> float:
+        """Average combined download rate in bytes per second"""
+        return self.bytes_downloaded / self.duration if self.duration > 0 else 0.0
+
+
+class LogCache:
+    """Persistent cache of downloaded log files
+
+    Log files are stored in a local directory, keyed by the log name and size, so a log that is
+    still growing on the drone is downloaded again when it changes. When the combined size of the
+    cached logs exceeds `max_size`, the least recently used logs are removed.
+
+    Enable the cache for the logs of a drone by assigning it to the `cache` attribute, eg.:
+    ```
+    myDrone.logs.cache = LogCache()
+    ```
+
+    *Arguments*:
+
+    * `directory`:
+        Directory to store the logs in. Defaults to `blueye/logs` in the user cache directory
+        (`$XDG_CACHE_HOME`, or `~/.cache`).
+    * `max_size`:
+        Maximum combined size of the cached logs in bytes
+    """
+
+    def __init__(self, directory: Optional[Path | str] = None, max_size: int = 10 * 1024**3):
+        if directory is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            directory = Path(cache_home) / "blueye" / "logs"
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+
+    def _path(self, name: str, filesize: int) -> Path:
+        return self.directory / f"{name}_{filesize}.bez"
+
+    def get(self, name: str, filesize: int) -> Optional[Path]:
+        """Get the path to a cached log file
+
+        *Arguments*:
+
+        * `name`:
+            Name of the log
+        * `filesize`:
+            Size of the log as listed in the log index
+
+        *Returns*:
+
+        The path to the cached log, or `None` if it is not in the cache
+        """
+        path = self._path(name, filesize)
+        try:
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            return None
+        return path
+
+    def fetch(
+        self,
+        log: LogFile,
+        refresh: bool = False,
+        timeout: float = 1,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> Path:
+        """Get a log from the cache, downloading it from the drone if it is missing
+
+        The log is downloaded to a temporary file that is renamed when complete, so a cached
+        file is never partially written.
+
+        *Arguments*:
+
+        * `log`:
+            The log to get
+        * `refresh`:
+            If True, the log will be downloaded even if it is already cached
+        * `timeout`:
+            Seconds to wait for the drone to respond or send more data
+        * `progress_callback`:
+            Function called with the number of bytes downloaded so far and the size of the
+            log file as each chunk is written
+
+        *Returns*:
+
+        The path to the cached log
+        """
+        if not refresh:
+            path = self.get(log.name, log.filesize)
+            if path is not None:
+                return path
+        path = log.download_to_file(
+            self._path(log.name, log.filesize),
+            timeout=timeout,
+            progress_callback=progress_callback,
+            resume=not refresh,
+        )
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None):
+        """Remove the least recently used logs until the cache is within `max_size`
+
+        *Arguments*:
+
+        * `keep`:
+            A cached log that should not be removed, even if the cache is still too large
+        """
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.bez"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            cache_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if cache_size <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                logger.debug(f"Removing {path.name} from the log cache")
+                path.unlink(missing_ok=True)
+                cache_size -= size
+
+    def clear(self):
+        """Remove all logs from the cache"""
+        with self._lock:
+            for path in self.directory.glob("*.bez*"):
+                path.unlink(missing_ok=True)
+
+
+class _ColumnBuilder:
+    """Collects the flattened scalar fields of one message type into columns"""
+
+    def __init__(self, msg_type):
+        self.accessors = scalar_field_accessors(message_descriptor(msg_type))
+        self.unix_timestamp = array.array("d")
+        self.time_since_start = array.array("d")
+        self.columns = [
+            array.array(typecode) if typecode is not None else []
+            for _, typecode, _ in self.accessors
+        ]
+
+    def append(self, unix_timestamp: float, time_since_start: float, msg):
+        self.unix_timestamp.append(unix_timestamp)
+        self.time_since_start.append(time_since_start)
+        pb_msg = getattr(msg, "_pb", msg)
+        for column, (_, _, getter) in zip(self.columns, self.accessors):
+            column.append(getter(pb_msg))
+
+    def to_numpy(self, np) -> Dict[str, "np.ndarray"]:
+        dtypes = {"d": np.float64, "q": np.int64, "Q": np.uint64, "b": np.bool_}
+        table = {
+            "unix_timestamp": np.frombuffer(self.unix_timestamp, dtype=np.float64),
+            "time_since_start": np.frombuffer(self.time_since_start, dtype=np.float64),
+        }
+        for column, (name, typecode, _) in zip(self.columns, self.accessors):
+            if typecode is None:
+                table[name] = np.array(column, dtype=object)
+            else:
+                table[name] = np.frombuffer(column, dtype=dtypes[typecode])
+        return table
+
+
 class LogFile:
     def __init__(
         self,
@@ -193,7 +671,9 @@ class LogFile:
         start_time: int,
         max_depth_magnitude: int,
         ip: str,
+        cache: Optional[LogCache] = None,
     ):
+        self.cache = cache
         self.name = name
         self.is_dive = is_dive
         self.filesize = filesize
@@ -201,6 +681,9 @@ class LogFile:
         self.max_depth_magnitude = max_depth_magnitude
         self.download_url = f"http://{ip}/logs/{self.name}/binlog"
         self.content = None
+        self._format_values()
+
+    def _format_values(self):
         self._formatted_values = [
             self.name,
             self.start_time.strftime("%d. %b %Y %H:%M"),
@@ -208,15 +691,44 @@ class LogFile:
             human_readable_filesize(self.filesize),
         ]
 
+    def _update(self, is_dive: bool, filesize: int, max_depth_magnitude: int):
+        """Update the log with new values from the log index"""
+        if filesize != self.filesize:
+            self.content = None  # The log has grown since it was downloaded
+        self.is_dive = is_dive
+        self.filesize = filesize
+        self.max_depth_magnitude = max_depth_magnitude
+        self._format_values()
+
+    def _resolve_output_path(self, output_path: Optional[Path | str]) -> Path:
+        if output_path is None:
+            return Path(f"{self.name}.bez")
+        output_path = Path(output_path)
+        if output_path.is_dir():
+            output_path = output_path.joinpath(f"{self.name}.bez")
+        return output_path
+
+    def _check_downloaded_size(self, downloaded_size: int):
+        # The log of the running dive keeps growing, so only a smaller size than listed in the
+        # index means the transfer was cut short
+        if downloaded_size < self.filesize:
+            raise ConnectionError(
+                f"Download of {self.name} ended after {downloaded_size} of {self.filesize} bytes"
+            )
+
     def download(
         self,
         output_path: Optional[Path | str] = None,
         write_to_file: bool = True,
         timeout: float = 1,
         overwrite_cache: bool = False,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
     ) -> bytes:
         """Download a log file from the drone
 
+        The log is kept in memory after it is downloaded. Use `download_to_file` to download
+        large logs directly to disk instead.
+
         *Arguments*:
 
         * `output_path`:
@@ -228,38 +740,152 @@ class LogFile:
             If True, the log will be written to the specified path. If False, the
             log will only be returned as a bytes object.
         * `timeout`:
-            Seconds to wait for response
+            Seconds to wait for the drone to respond or send more data
         * `overwrite_cache`:
             If True, the log will be downloaded even if it is already been downloaded.
+        * `progress_callback`:
+            Function called with the number of bytes downloaded so far and the size of the
+            log file as each chunk is received
+
+        *Raises*:
+
+        * `ConnectionError`:
+            If the download ended before the whole log file was received
 
         *Returns*:
 
         The compressed log file as a bytes object.
         """
         if self.content is None or overwrite_cache:
-            self.content = requests.get(self.download_url, timeout=timeout).content
-        if write_to_file:
-            if output_path is None:
-                output_path = Path(f"{self.name}.bez")
+            if self.cache is not None:
+                cached_path = self.cache.fetch(
+                    self,
+                    refresh=overwrite_cache,
+                    timeout=timeout,
+                    progress_callback=progress_callback,
+                )
+                self.content = cached_path.read_bytes()
+            elif write_to_file:
+                output_path = self.download_to_file(
+                    output_path, timeout=timeout, progress_callback=progress_callback
+                )
+                self.content = output_path.read_bytes()
+                return self.content
             else:
-                if type(output_path) == str:
-                    output_path = Path(output_path)
-                if output_path.is_dir():
-                    output_path = output_path.joinpath(f"{self.name}.bez")
-            with open(output_path, "wb") as f:
+                self.content = self._download_to_memory(timeout, progress_callback)
+        if write_to_file:
+            with open(self._resolve_output_path(output_path), "wb") as f:
                 f.write(self.content)
         return self.content
 
-    def parse_to_stream(self) -> LogStream:
+    def _download_to_memory(
+        self, timeout: float, progress_callback: Optional[Callable[[int, int], None]]
+    ) -> bytes:
+        content = bytearray()
+        with requests.get(self.download_url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                content += chunk
+                if progress_callback is not None:
+                    progress_callback(len(content), self.filesize)
+        self._check_downloaded_size(len(content))
+        return bytes(content)
+
+    def download_to_file(
+        self,
+        output_path: Optional[Path | str] = None,
+        timeout: float = 1,
+        chunk_size: int = 1 << 16,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        resume: bool = True,
+        session: Optional[requests.Session] = None,
+    ) -> Path:
+        """Download a log file from the drone directly to disk
+
+        The log is written to disk as it is received, so it is never held in memory. The data
+        is first written to a `.part` file next to the output path, which is renamed once the
+        whole log has been received. If a download fails, calling this method again will resume
+        from the end of the `.part` file, provided the drone supports HTTP range requests.
+
+        *Arguments*:
+
+        * `output_path`:
+            Path to write the log file to. If `None`, the log will be written to the
+            current working directory. If the path is a directory, the log will be
+            downloaded to that directory with its original name. Else the log will be
+            downloaded to the specified path.
+        * `timeout`:
+            Seconds to wait for the drone to respond or send more data
+        * `chunk_size`:
+            Number of bytes to receive before writing to disk
+        * `progress_callback`:
+            Function called with the number of bytes downloaded so far and the size of the
+            log file as each chunk is written
+        * `resume`:
+            If True, continue a previously interrupted download instead of starting over
+        * `session`:
+            Session to send the request with, allows reusing the connection across downloads
+
+        *Raises*:
+
+        * `ConnectionError`:
+            If the download ended before the whole log file was received. The partial file is
+            kept so the download can be resumed.
+
+        *Returns*:
+
+        The path the log file was written to
+        """
+        output_path = self._resolve_output_path(output_path)
+        partial_path = output_path.with_name(output_path.name + ".part")
+        downloaded_size = 0
+        if resume and partial_path.exists():
+            downloaded_size = partial_path.stat().st_size
+        headers = {"Range": f"bytes={downloaded_size}-"} if downloaded_size > 0 else {}
+
+        http = requests if session is None else session
+        with http.get(self.download_url, headers=headers, stream=True, timeout=timeout) as response:
+            if downloaded_size > 0 and response.status_code == 416:
+                # Nothing left to download after the end of the partial file
+                pass
+            else:
+                response.raise_for_status()
+                if response.status_code != 206 and downloaded_size > 0:
+                    logger.info(f"Range requests not supported, restarting download of {self.name}")
+                    downloaded_size = 0
+                with open(partial_path, "ab" if downloaded_size > 0 else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        downloaded_size += len(chunk)
+                        if progress_callback is not None:
+                            progress_callback(downloaded_size, self.filesize)
+
+        self._check_downloaded_size(downloaded_size)
+        partial_path.replace(output_path)
+        return output_path
+
+    def parse_to_stream(
+        self, types: Optional[Iterable[proto.message.MessageMeta]] = None, raw_pb: bool = False
+    ) -> LogStream:
         """Parse the log file to a stream
 
-        Will download the log if it is not already downloaded.
+        Will download the log if it is not already downloaded. If a cache is set, the log is
+        parsed directly from the cached file.
+
+        *Arguments*:
+
+        * `types`:
+            Only return records with these message types. All records are returned if `None`.
+        * `raw_pb`:
+            Return the underlying protobuf messages instead of the proto-plus wrappers
 
         *Returns*:
 
         A `LogStream` object
         """
-        return LogStream(self.download(write_to_file=False))
+        if self.cache is not None and self.content is None:
+            return LogStream.from_path(self.cache.fetch(self), types=types, raw_pb=raw_pb)
+        return LogStream(self.download(write_to_file=False), types=types, raw_pb=raw_pb)
 
     def __format__(self, format_specifier):
         if format_specifier == "with_header":
@@ -277,14 +903,39 @@ class LogFile:
 
 
 class Logs:
-    def __init__(self, parent_drone, auto_download_index=False):
+    def __init__(
+        self,
+        parent_drone,
+        auto_download_index=False,
+        cache: Optional[LogCache] = None,
+        max_concurrent_requests: int = 8,
+    ):
         self._parent_drone = parent_drone
         self.auto_download_index = auto_download_index
         self.index_downloaded = False
-        self._logs = {}
+        self._set_logs([])
+        self._logs_without_binlog = set()
+        self._cache = cache
+        # Number of dive info requests sent at the same time on Blunux < 3.3
+        self.max_concurrent_requests = max_concurrent_requests
+        self._dive_info_cache: Dict[str, dict] = {}
         if auto_download_index:
             self.refresh_log_index()
 
+    @property
+    def cache(self) -> Optional[LogCache]:
+        """Persistent cache the logs are downloaded to and read from, see `LogCache`
+
+        Set to `None` (the default) to disable the cache.
+        """
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Optional[LogCache]):
+        self._cache = cache
+        for log in self._logs.values():
+            log.cache = cache
+
     def refresh_log_index(self):
         """Refresh the log index from the drone
 
@@ -301,30 +952,71 @@ class Logs:
         logs: List[dict] = requests.get(logs_endpoint).json()
 
         if version.parse(self._parent_drone.software_version_short) < version.parse("3.3"):
-            # Extend index with dive info, sends a request for each log file so can be quite slow
-            # for drones with many logs. Not necessary for Blunux >= 3.3 as dive info is included in
-            # the index.
-            logger.debug(f"Getting dive info for {len(logs)} logs")
-            for index, log in enumerate(logs):
-                dive_info = requests.get(f"{logs_endpoint}/{log['name']}/dive_info").json()
-                logs[index].update(dive_info)
-
-        # Instantiate log objects for each log
-        logger.debug(f"Creating log objects for {len(logs)} logs")
+            # Extend index with dive info. Not necessary for Blunux >= 3.3 as dive info is included
+            # in the index.
+            self._add_dive_info(logs, logs_endpoint)
+
+        # Reuse the log objects from earlier refreshes, and only instantiate the new logs
+        updated_logs = {}
+        new_log_count = 0
         for log in logs:
-            if log["has_binlog"]:
-                self._logs[log["name"]] = LogFile(
-                    log["name"],
+            name = log["name"]
+            if not log["has_binlog"]:
+                if name not in self._logs_without_binlog:
+                    logger.info(f"Log {name} does not have a binlog, ignoring")
+                    self._logs_without_binlog.add(name)
+                continue
+            log_file = self._logs.get(name)
+            if log_file is None:
+                log_file = LogFile(
+                    name,
                     log["is_dive"],
                     log["binlog_size"],
                     log["start_time"],
                     log["max_depth_magnitude"],
                     self._parent_drone._ip,
+                    self._cache,
                 )
+                new_log_count += 1
             else:
-                logger.info(f"Log {log['name']} does not have a binlog, ignoring")
+                log_file._update(log["is_dive"], log["binlog_size"], log["max_depth_magnitude"])
+            updated_logs[name] = log_file
+        logger.debug(f"Created log objects for {new_log_count} new logs")
+        self._set_logs(updated_logs.values())
         self.index_downloaded = True
 
+    def _set_logs(self, logs: Iterable[LogFile]):
+        self._ordered_logs: List[LogFile] = list(logs)
+        self._logs = {log.name: log for log in self._ordered_logs}
+
+    def _add_dive_info(self, logs: List[dict], logs_endpoint: str):
+        """Fetch the dive info for each log and add it to the log entry
+
+        A request is needed for each log, so they are sent concurrently over a shared session.
+        The dive info of closed logs does not change, so it is cached across refreshes.
+        """
+        missing = [log for log in logs if log["name"] not in self._dive_info_cache]
+        logger.debug(f"Getting dive info for {len(missing)} logs")
+        if missing:
+            with requests.Session() as session:
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_concurrent_requests)
+                session.mount("http://", adapter)
+
+                def get_dive_info(log: dict) -> dict:
+                    return session.get(f"{logs_endpoint}/{log['name']}/dive_info").json()
+
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_concurrent_requests
+                ) as executor:
+                    dive_infos = executor.map(get_dive_info, missing)
+                    for log, dive_info in zip(missing, dive_infos):
+                        self._dive_info_cache[log["name"]] = dive_info
+        for log in logs:
+            log.update(self._dive_info_cache[log["name"]])
+            if log.get("is_open", False):
+                # The log is still being written to, so the dive info may change
+                del self._dive_info_cache[log["name"]]
+
     def __len__(self):
         if not self.index_downloaded:
             self.refresh_log_index()
@@ -339,18 +1031,17 @@ class Logs:
             except KeyError:
                 raise KeyError(f"A log with the name '{item}' does not exist")
         elif isinstance(item, slice):
-            logs_slice = Logs(self._parent_drone)
-            for log in list(self._logs.values())[item]:
-                logs_slice._logs[log.name] = log
+            logs_slice = Logs(self._parent_drone, cache=self._cache)
+            logs_slice._set_logs(self._ordered_logs[item])
             logs_slice.index_downloaded = True
             return logs_slice
         else:
             try:
-                return list(self._logs.values())[item]
+                return self._ordered_logs[item]
             except IndexError:
                 raise IndexError(
                     f"Tried to access log nr {item}, "
-                    + f"but there are only {len(self._logs.values())} logs available"
+                    + f"but there are only {len(self._ordered_logs)} logs available"
                 )
 
     def __str__(self):
@@ -373,13 +1064,118 @@ class Logs:
         """
         if not self.index_downloaded:
             self.refresh_log_index()
-        filtered_logs = Logs(self._parent_drone)
+        filtered_logs = Logs(self._parent_drone, cache=self._cache)
         filtered_logs.index_downloaded = True
-        for log in self:
-            if filter_func(log):
-                filtered_logs._logs[log.name] = log
+        filtered_logs._set_logs(log for log in self._ordered_logs if filter_func(log))
         return filtered_logs
 
+    def download_all(
+        self,
+        dest: Path | str = ".",
+        max_workers: int = 4,
+        filter_func: Optional[Callable[[LogFile], bool]] = None,
+        max_bytes_per_second: Optional[float] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        timeout: float = 1,
+    ) -> LogDownloadSummary:
+        """Download several logs to a folder concurrently
+
+        All downloads share one connection pool to the drone. Logs that already exist in the
+        destination folder with the size listed in the index are skipped, and interrupted
+        downloads are resumed (see `LogFile.download_to_file`).
+
+        *Arguments*:
+
+        * `dest`:
+            Folder to download the logs to. Will be created if it does not exist.
+        * `max_workers`:
+            Number of logs to download at the same time
+        * `filter_func`:
+            Only download the logs this function returns True for, eg.
+            `lambda log: log.is_dive`. All logs are downloaded if `None`.
+        * `max_bytes_per_second`:
+            Cap on the combined download rate of all logs. No cap if `None`.
+        * `progress_callback`:
+            Function called with the combined number of bytes downloaded so far and the total
+            number of bytes to download
+        * `timeout`:
+            Seconds to wait for the drone to respond or send more data
+
+        *Returns*:
+
+        A `LogDownloadSummary` with the downloaded, skipped, and failed logs, and the combined
+        throughput.
+        """
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        logs = self if filter_func is None else self.filter(filter_func)
+
+        to_download: List[LogFile] = []
+        skipped: List[Path] = []
+        # Size of the partial file of each log, which an interrupted download resumes from
+        partial_sizes: Dict[str, int] = {}
+        for log in logs:
+            output_path = dest / f"{log.name}.bez"
+            if output_path.exists() and output_path.stat().st_size == log.filesize:
+                skipped.append(output_path)
+            else:
+                to_download.append(log)
+                partial_path = output_path.with_name(output_path.name + ".part")
+                partial_sizes[log.name] = (
+                    partial_path.stat().st_size if partial_path.exists() else 0
+                )
+
+        limiter = _BandwidthLimiter(max_bytes_per_second) if max_bytes_per_second else None
+        total_size = sum(max(log.filesize - partial_sizes[log.name], 0) for log in to_download)
+        progress_lock = threading.Lock()
+        bytes_downloaded = 0
+
+        def download(log: LogFile, session: requests.Session) -> Path:
+            last_size = partial_sizes[log.name]
+
+            def on_chunk(downloaded_size: int, _):
+                nonlocal last_size, bytes_downloaded
+                if downloaded_size < last_size:
+                    # The drone did not accept the range request, so the download restarted
+                    last_size = 0
+                chunk_size = downloaded_size - last_size
+                last_size = downloaded_size
+                with progress_lock:
+                    bytes_downloaded += chunk_size
+                    if progress_callback is not None:
+                        progress_callback(bytes_downloaded, total_size)
+                if limiter is not None:
+                    limiter.consume(chunk_size)
+
+            return log.download_to_file(
+                dest, timeout=timeout, progress_callback=on_chunk, session=session
+            )
+
+        downloaded: List[Path] = []
+        failed: Dict[str, Exception] = {}
+        start_time = time.monotonic()
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(download, log, session): log for log in to_download}
+                for future in concurrent.futures.as_completed(futures):
+                    log = futures[future]
+                    try:
+                        downloaded.append(future.result())
+                    except Exception as e:
+                        logger.warning(f"Failed to download {log.name}: {e}")
+                        failed[log.name] = e
+        summary = LogDownloadSummary(
+            downloaded, skipped, failed, bytes_downloaded, time.monotonic() - start_time
+        )
+        logger.info(
+            f"Downloaded {len(downloaded)} logs ({human_readable_filesize(bytes_downloaded)}) at "
+            f"{human_readable_filesize(summary.throughput)}/s, skipped {len(skipped)}, "
+            f"{len(failed)} failed"
+        )
+        return summary
+
 
 class LegacyLogFile:
     """
@@ -209,7 +209,8 @@ class Mission:
         if msg is None:
             return None
         else:
-            return msg.mission_status
+            # The telemetry message is cached and shared, so the caller gets a copy to modify
+            return bp.MissionStatus(msg.mission_status)
 
     def get_active(self) -> bp.Mission:
         """Get the current active mission.
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import time
+from fnmatch import fnmatchcase
+from operator import attrgetter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+import proto
+
+from .utils import fields_getter, message_descriptor, scalar_field_accessors
+
+if TYPE_CHECKING:
+    import numpy
+
+    from .connection import TelemetryClient
+
+
+class _TimeSeries:
+    """Preallocated, growable arrays with the recorded fields of one message type"""
+
+    def __init__(
+        self,
+        msg_type: proto.message.MessageMeta,
+        patterns: Optional[Iterable[str]],
+        capacity: int,
+        np,
+    ):
+        accessors = [
+            accessor
+            for accessor in scalar_field_accessors(message_descriptor(msg_type))
+            if accessor[1] is not None
+        ]
+        if patterns is not None:
+            selected = {}
+            for pattern in patterns:
+                matches = [accessor for accessor in accessors if fnmatchcase(accessor[0], pattern)]
+                if not matches:
+                    raise ValueError(
+                        f"{msg_type.__name__} has no numeric field matching '{pattern}'"
+                    )
+                for accessor in matches:
+                    selected.setdefault(accessor[0], accessor)
+            accessors = list(selected.values())
+        # Plain fields are read together, while timestamps and durations need to be converted
+        plain = [accessor for accessor in accessors if isinstance(accessor[2], attrgetter)]
+        converted = [accessor for accessor in accessors if not isinstance(accessor[2], attrgetter)]
+        self._get_plain = fields_getter([name for name, _, _ in plain])
+        self._converted = [getter for _, _, getter in converted]
+
+        dtypes = {"d": np.float64, "q": np.int64, "Q": np.uint64, "b": np.bool_}
+        self.names = ["unix_timestamp"] + [name for name, _, _ in plain + converted]
+        self._dtypes = [np.float64] + [dtypes[typecode] for _, typecode, _ in plain + converted]
+        self._np = np
+        self._count = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        arrays = [self._np.empty(capacity, dtype=dtype) for dtype in self._dtypes]
+        if self._count > 0:
+            for array, old_array in zip(arrays, self._arrays):
+                array[: self._count] = old_array[: self._count]
+        # Memoryviews are used for writing, since setting single items is faster than through NumPy
+        self._views = [memoryview(array) for array in arrays]
+        self._arrays = arrays
+        self._capacity = capacity
+
+    def append(self, timestamp: float, pb_msg):
+        row = self._count
+        if row == self._capacity:
+            self._allocate(2 * self._capacity)
+        views = self._views
+        views[0][row] = timestamp
+        column = 1
+        for value in self._get_plain(pb_msg):
+            views[column][row] = value
+            column += 1
+        for getter in self._converted:
+            views[column][row] = getter(pb_msg)
+            column += 1
+        # The row is complete before it is counted, so snapshots never see partial rows
+        self._count = row + 1
+
+    def snapshot(self) -> Dict[str, "numpy.ndarray"]:
+        # The count is read before the arrays, since the arrays are only replaced by larger ones
+        count = self._count
+        arrays = self._arrays
+        columns = {}
+        for name, array in zip(self.names, arrays):
+            column = array[:count]
+            column.flags.writeable = False
+            columns[name] = column
+        return columns
+
+
+class TelemetryRecorder:
+    """Records fields of telemetry messages into NumPy arrays
+
+    The selected fields of each received message are written to preallocated arrays, together with
+    the time the message was received. The arrays double in size when they are full. Snapshots are
+    read-only views of the arrays, so taking one does not copy any data, and it is not changed by
+    messages received afterwards.
+
+    Requires NumPy to be installed.
+
+    Example:
+        ```python
+        recorder = TelemetryRecorder({bp.DepthTel: ["depth.value"], bp.AttitudeTel: ["attitude.*"]})
+        myDrone.telemetry.attach_recorder(recorder)
+        ...
+        depth = recorder.snapshot(bp.DepthTel)
+        plt.plot(depth["unix_timestamp"], depth["depth.value"])
+        ```
+    """
+
+    def __init__(
+        self,
+        fields: (
+            Dict[proto.message.MessageMeta, Optional[Iterable[str]]]
+            | Iterable[proto.message.MessageMeta]
+        ),
+        initial_capacity: int = 1024,
+    ):
+        """Initialize the TelemetryRecorder.
+
+        Args:
+            fields: The fields to record for each message type, e.g.
+                    `{bp.DepthTel: ["depth.value"]}`. Nested fields are named by joining the field
+                    names with dots, and shell-style wildcards can be used to select several fields,
+                    e.g. `"attitude.*"`. All numeric fields of a message type are recorded if its
+                    fields are `None`, or if a list of message types is given instead of a
+                    dictionary.
+            initial_capacity: The number of messages of each type to allocate space for up front.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If no message types are given, or if a field pattern does not match any
+                        numeric field of the message type.
+        """
+        try:
+            import numpy
+        except ImportError as e:
+            raise ImportError(
+                "TelemetryRecorder requires NumPy, install it with `pip install numpy`"
+            ) from e
+        if initial_capacity < 1:
+            raise ValueError(f"initial_capacity must be 1 or larger, got {initial_capacity}")
+        if not isinstance(fields, dict):
+            fields = {msg_type: None for msg_type in fields}
+        if not fields:
+            # An empty message filter would subscribe the recorder to every message type
+            raise ValueError("At least one message type has to be recorded")
+        self._np = numpy
+        self._fields = fields
+        self._initial_capacity = initial_capacity
+        self._series = self._create_series()
+        self._client: Optional[TelemetryClient] = None
+        self._callback_id: Optional[str] = None
+
+    def _create_series(self) -> Dict[str, _TimeSeries]:
+        return {
+            msg_type.__name__: _TimeSeries(msg_type, patterns, self._initial_capacity, self._np)
+            for msg_type, patterns in self._fields.items()
+        }
+
+    def _on_message(self, msg_type_name: str, msg):
+        self._series[msg_type_name].append(time.time(), msg)
+
+    def attach(self, telemetry_client: TelemetryClient):
+        """Start recording the messages received by a telemetry client.
+
+        Args:
+            telemetry_client: The client to record messages from.
+
+        Raises:
+            RuntimeError: If the recorder is already attached to a client.
+        """
+        if self._client is not None:
+            raise RuntimeError("The recorder is already attached to a telemetry client")
+        self._callback_id = telemetry_client.add_callback(
+            list(self._fields), self._on_message, raw=False, raw_pb=True
+        )
+        self._client = telemetry_client
+
+    def detach(self):
+        """Stop recording. The recorded data is kept."""
+        if self._client is not None:
+            self._client.remove_callback(self._callback_id)
+            self._client = None
+            self._callback_id = None
+
+    def snapshot(self, msg_type: proto.message.MessageMeta) -> Dict[str, "numpy.ndarray"]:
+        """Get the data recorded so far for a message type.
+
+        Args:
+            msg_type: The message type to get the data of.
+
+        Returns:
+            A dictionary with a read-only array for each recorded field, and the receive
+            timestamps in seconds since the epoch as `unix_timestamp`.
+
+        Raises:
+            KeyError: If the message type is not recorded.
+        """
+        return self._series[msg_type.__name__].snapshot()
+
+    def clear(self):
+        """Discard the recorded data.
+
+        Snapshots taken earlier keep their data, since new arrays are allocated.
+        """
+        self._series = self._create_series()
+
+    @property
+    def fields(self) -> Dict[proto.message.MessageMeta, List[str]]:
+        """The names of the recorded fields of each message type."""
+        return {msg_type: self._series[msg_type.__name__].names[1:] for msg_type in self._fields}
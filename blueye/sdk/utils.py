@@ -1,11 +1,17 @@
+import operator
 import os
+import types
 import webbrowser
-from typing import Tuple
+from json import JSONDecodeError
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import blueye.protocol as bp
 import google.protobuf.wrappers_pb2 as wrappers
 import proto
+import proto.marshal.collections
+import requests
 from google.protobuf.any_pb2 import Any
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
 from google.protobuf.wrappers_pb2 import (
     BoolValue,
     BytesValue,
@@ -34,27 +40,183 @@ def open_local_documentation():
     webbrowser.open(documentation_path)
 
 
-def deserialize_any_to_message(msg: Any) -> Tuple[proto.message.MessageMeta, proto.message.Message]:
+_TYPE_URL_PREFIX = "type.googleapis.com/"
+
+# Maps type URLs to the message class and whether it is a proto-plus class. Unknown type URLs are
+# stored as None so that they fail fast on later lookups.
+_message_types_by_type_url: Dict[str, Optional[Tuple[type, bool]]] = {}
+
+
+def _build_type_url_table():
+    table = {}
+    for name in dir(wrappers):
+        wrapper_type = getattr(wrappers, name)
+        if isinstance(wrapper_type, type) and hasattr(wrapper_type, "DESCRIPTOR"):
+            table[_TYPE_URL_PREFIX + wrapper_type.DESCRIPTOR.full_name] = (wrapper_type, False)
+    for name in dir(bp):
+        msg_type = getattr(bp, name)
+        if isinstance(msg_type, proto.message.MessageMeta):
+            table[_TYPE_URL_PREFIX + message_descriptor(msg_type).full_name] = (msg_type, True)
+    _message_types_by_type_url.update(table)
+
+
+def _resolve_type_url(type_url: str) -> Optional[Tuple[type, bool]]:
+    """Find the message class for a type URL by name, the way it was resolved before the table"""
+    if type_url.startswith("type.googleapis.com/google.protobuf"):
+        payload_type = getattr(
+            wrappers, type_url.replace(_TYPE_URL_PREFIX + "google.protobuf.", ""), None
+        )
+        return (payload_type, False) if payload_type is not None else None
+    payload_type = getattr(bp, type_url.replace(_TYPE_URL_PREFIX + "blueye.protocol.", ""), None)
+    return (payload_type, True) if payload_type is not None else None
+
+
+class DroneInfo(NamedTuple):
+    """Information about a drone, as reported by its diagnostics endpoint"""
+
+    features: List[str]
+    software_version: str
+    software_version_short: str
+    serial_number: str
+    uuid: str
+
+
+def request_drone_info(ip: str, timeout: float) -> DroneInfo:
+    """Request information about the drone over HTTP
+
+    Args:
+        ip (str): The IP address of the drone.
+        timeout (float): The timeout for the request.
+
+    Returns:
+        The features, software version, serial number and hardware id of the drone.
+
+    Raises:
+        ConnectionError: If the connection to the drone could not be established.
+    """
+    try:
+        response = requests.get(f"http://{ip}/diagnostics/drone_info", timeout=timeout).json()
+    except (
+        requests.ConnectTimeout,
+        requests.ReadTimeout,
+        requests.ConnectionError,
+        JSONDecodeError,
+    ) as e:
+        raise ConnectionError("Could not establish connection with drone") from e
+    try:
+        features = list(filter(None, response["features"].split(",")))
+    except KeyError:
+        # Drone versions older than 1.4.7 did not have this field.
+        features = []
+    software_version = response["sw_version"]
+    return DroneInfo(
+        features=features,
+        software_version=software_version,
+        software_version_short=software_version.split("-")[0],
+        serial_number=response["serial_number"],
+        uuid=response["hardware_id"],
+    )
+
+
+def message_type_from_type_url(type_url: str) -> Tuple[type, bool]:
+    """Look up the message class for the type URL of an Any message
+
+    The lookup table covers all messages in blueye.protocol and the well-known wrappers, and is
+    built on the first call.
+
+    Args:
+        type_url (str): The type URL, eg. `type.googleapis.com/blueye.protocol.DepthTel`
+
+    Raises:
+        AttributeError: If the type URL does not match a known message type
+
+    Returns:
+        A tuple with the message class and a flag that is True for proto-plus classes from
+        blueye.protocol, and False for protobuf classes from google.protobuf.wrappers_pb2.
+    """
+    try:
+        message_type = _message_types_by_type_url[type_url]
+    except KeyError:
+        if not _message_types_by_type_url:
+            _build_type_url_table()
+        if type_url not in _message_types_by_type_url:
+            _message_types_by_type_url[type_url] = _resolve_type_url(type_url)
+        message_type = _message_types_by_type_url[type_url]
+    if message_type is None:
+        raise AttributeError(f"Unknown message type '{type_url}'")
+    return message_type
+
+
+_TOPIC_PREFIX = "blueye.protocol."
+
+# Maps telemetry topics to the message class and its short name. Unknown topics are stored as None
+# so that they are only logged once.
+_message_types_by_topic: Dict[bytes, Optional[Tuple[proto.message.MessageMeta, str]]] = {}
+
+
+def _build_topic_table():
+    table = {}
+    for name in dir(bp):
+        msg_type = getattr(bp, name)
+        if isinstance(msg_type, proto.message.MessageMeta):
+            full_name = message_descriptor(msg_type).full_name
+            if full_name.startswith(_TOPIC_PREFIX):
+                table[full_name.encode()] = (msg_type, full_name.replace(_TOPIC_PREFIX, ""))
+    _message_types_by_topic.update(table)
+
+
+def message_type_from_topic(topic: bytes) -> Optional[Tuple[proto.message.MessageMeta, str]]:
+    """Look up the message class for a telemetry topic
+
+    The lookup table covers all messages in blueye.protocol, and is built on the first call.
+    Unknown topics are cached as well, so repeated lookups are just as cheap.
+
+    Args:
+        topic (bytes): The topic of the telemetry message, eg. `b"blueye.protocol.DepthTel"`
+
+    Returns:
+        A tuple with the message class and the message name without the package prefix, or None
+        if the topic does not match a known message type.
+    """
+    try:
+        return _message_types_by_topic[topic]
+    except KeyError:
+        pass
+    if not _message_types_by_topic:
+        _build_topic_table()
+        if topic in _message_types_by_topic:
+            return _message_types_by_topic[topic]
+    msg_type_name = topic.decode("utf-8").replace(_TOPIC_PREFIX, "")
+    msg_type = getattr(bp, msg_type_name, None)
+    if isinstance(msg_type, proto.message.MessageMeta):
+        _message_types_by_topic[topic] = (msg_type, msg_type_name)
+    else:
+        _message_types_by_topic[topic] = None
+    return _message_types_by_topic[topic]
+
+
+def deserialize_any_to_message(
+    msg: Any, raw_pb: bool = False
+) -> Tuple[proto.message.MessageMeta, proto.message.Message]:
     """Deserialize a protobuf Any message to a concrete message type.
 
     Args:
         msg (Any): The Any message to deserialize. Needs to be a message defined in the
                    blueye.protocol package or a well-known-type (FloatValue, Int32Value, etc) from
                    google.protobuf.wrappers_pb2
+        raw_pb (bool, optional): Return blueye.protocol messages as the underlying protobuf message
+                                 instead of the proto-plus wrapper. Field access is faster on the
+                                 protobuf message.
 
     Returns:
         A tuple with the message type and the deserialized message.
     """
-    if msg.type_url.startswith("type.googleapis.com/google.protobuf"):
-        payload_msg_name = msg.type_url.replace("type.googleapis.com/google.protobuf.", "")
-        payload_type = wrappers.__getattribute__(payload_msg_name)
-        payload_msg_deserialized = payload_type.FromString(msg.value)
-        return (payload_type, payload_msg_deserialized)
-
-    payload_msg_name = msg.type_url.replace("type.googleapis.com/blueye.protocol.", "")
-    payload_type = bp.__getattribute__(payload_msg_name)
-    payload_msg_deserialized = payload_type.deserialize(msg.value)
-    return (payload_type, payload_msg_deserialized)
+    payload_type, is_proto_plus = message_type_from_type_url(msg.type_url)
+    if is_proto_plus:
+        if raw_pb:
+            return (payload_type, payload_type.pb().FromString(msg.value))
+        return (payload_type, payload_type.deserialize(msg.value))
+    return (payload_type, payload_type.FromString(msg.value))
 
 
 def is_scalar_type(msg: proto.message.Message) -> bool:
@@ -79,3 +241,207 @@ def is_scalar_type(msg: proto.message.Message) -> bool:
         BytesValue,
     )
     return isinstance(msg, scalar_types)
+
+
+def _freeze(value):
+    """Wrap proto-plus messages and containers so that they cannot be modified."""
+    if isinstance(value, proto.message.Message):
+        return FrozenMessage(value)
+    if isinstance(
+        value, (proto.marshal.collections.Repeated, proto.marshal.collections.RepeatedComposite)
+    ):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, proto.marshal.collections.MapComposite):
+        return types.MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+class FrozenMessage:
+    """A read-only view of a proto-plus message.
+
+    Field access works as on the wrapped message, with nested messages returned as frozen views
+    and repeated fields returned as tuples. Assigning to or deleting a field raises an
+    `AttributeError`. Used when several telemetry callbacks share the same deserialized message.
+
+    The view guards against accidental modification only, the underlying protobuf message is still
+    reachable through `_pb`.
+
+    Args:
+        message (proto.message.Message): The message to wrap.
+    """
+
+    __slots__ = ("_message",)
+
+    def __init__(self, message: proto.message.Message):
+        object.__setattr__(self, "_message", message)
+
+    def __getattr__(self, name):
+        return _freeze(getattr(self._message, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Cannot set '{name}' on a read-only message")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Cannot delete '{name}' on a read-only message")
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenMessage):
+            other = other._message
+        return self._message == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FrozenMessage({self._message!r})"
+
+    def __str__(self):
+        return str(self._message)
+
+
+def message_descriptor(msg_type) -> Descriptor:
+    """Get the protobuf descriptor of a message type
+
+    Args:
+        msg_type: A proto-plus message class from blueye.protocol, or a protobuf message class such
+                  as the well-known wrappers.
+
+    Returns:
+        The descriptor of the message type.
+    """
+    if isinstance(msg_type, proto.message.MessageMeta):
+        return msg_type.pb().DESCRIPTOR
+    return msg_type.DESCRIPTOR
+
+
+# Typecodes of the array.array used to collect the values of each scalar field type. None means the
+# values are kept in a list.
+_FIELD_TYPECODES = {
+    FieldDescriptor.TYPE_DOUBLE: "d",
+    FieldDescriptor.TYPE_FLOAT: "d",
+    FieldDescriptor.TYPE_INT32: "q",
+    FieldDescriptor.TYPE_INT64: "q",
+    FieldDescriptor.TYPE_SINT32: "q",
+    FieldDescriptor.TYPE_SINT64: "q",
+    FieldDescriptor.TYPE_SFIXED32: "q",
+    FieldDescriptor.TYPE_SFIXED64: "q",
+    FieldDescriptor.TYPE_ENUM: "q",
+    FieldDescriptor.TYPE_UINT32: "Q",
+    FieldDescriptor.TYPE_UINT64: "Q",
+    FieldDescriptor.TYPE_FIXED32: "Q",
+    FieldDescriptor.TYPE_FIXED64: "Q",
+    FieldDescriptor.TYPE_BOOL: "b",
+    FieldDescriptor.TYPE_STRING: None,
+    FieldDescriptor.TYPE_BYTES: None,
+}
+
+_TIME_MESSAGES = ("google.protobuf.Timestamp", "google.protobuf.Duration")
+
+
+def _is_repeated(field: FieldDescriptor) -> bool:
+    if hasattr(field, "is_repeated"):
+        return field.is_repeated
+    return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def _time_field_getter(path: str) -> Callable:
+    get_time = operator.attrgetter(path)
+
+    def getter(pb_msg):
+        value = get_time(pb_msg)
+        return value.seconds + value.nanos * 1e-9
+
+    return getter
+
+
+def scalar_field_accessors(
+    descriptor: Descriptor, prefix: str = ""
+) -> List[Tuple[str, Optional[str], Callable]]:
+    """Flatten the scalar fields of a message into accessors for each field
+
+    Nested messages are flattened with the field names joined by dots, eg. `imu.gyroscope.x`, and
+    timestamps and durations are converted to seconds. Repeated fields and maps are left out.
+
+    Args:
+        descriptor: The descriptor of the message, see `message_descriptor`
+        prefix: Prefix added to the field names
+
+    Returns:
+        A list of (field name, array typecode, getter) tuples, where the getter takes the raw
+        protobuf message (`_pb` of a proto-plus message) and returns the value of the field. The
+        typecode is the `array.array` typecode the values fit in, or None for strings and bytes.
+    """
+    accessors = []
+    for field in descriptor.fields:
+        if _is_repeated(field):
+            continue
+        name = prefix + field.name
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            if field.message_type.full_name in _TIME_MESSAGES:
+                accessors.append((name, "d", _time_field_getter(name)))
+            elif field.message_type is not descriptor:  # Skip self-referencing messages
+                accessors.extend(scalar_field_accessors(field.message_type, name + "."))
+        elif field.type in _FIELD_TYPECODES:
+            accessors.append((name, _FIELD_TYPECODES[field.type], operator.attrgetter(name)))
+    return accessors
+
+
+def _nested_fields_getter(paths: List[Tuple[str, ...]]) -> Tuple[List[Tuple[str, ...]], Callable]:
+    # Returns the paths in the order the getter returns their values, and the getter itself
+    leaves = [path[0] for path in paths if len(path) == 1]
+    groups: Dict[str, List[Tuple[str, ...]]] = {}
+    for path in paths:
+        if len(path) > 1:
+            groups.setdefault(path[0], []).append(path[1:])
+    order = [(leaf,) for leaf in leaves]
+    if len(leaves) == 1:
+        leaf = leaves[0]
+
+        def get_leaves(msg):
+            return (getattr(msg, leaf),)
+
+    elif leaves:
+        get_leaves = operator.attrgetter(*leaves)
+    else:
+        get_leaves = None
+    children = []
+    for name, sub_paths in groups.items():
+        child_order, child_getter = _nested_fields_getter(sub_paths)
+        order.extend((name,) + path for path in child_order)
+        children.append((operator.attrgetter(name), child_getter))
+    if not children:
+        return order, get_leaves
+
+    def getter(msg):
+        values = get_leaves(msg) if get_leaves is not None else ()
+        for get_child, child_getter in children:
+            values += child_getter(get_child(msg))
+        return values
+
+    return order, getter
+
+
+def fields_getter(paths: List[str]) -> Callable:
+    """Create a function that reads several, possibly nested, fields of a message at once
+
+    Fields sharing a parent message only read the parent once, which is several times faster than
+    one `operator.attrgetter` per field when the fields are deeply nested.
+
+    Args:
+        paths: Dotted field paths, eg. `["imu.gyroscope.x", "imu.gyroscope.y"]`
+
+    Returns:
+        A function that takes a message and returns a tuple with the values of the fields, in the
+        same order as `paths`
+    """
+    if not paths:
+        return lambda msg: ()
+    split_paths = [tuple(path.split(".")) for path in paths]
+    order, getter = _nested_fields_getter(list(dict.fromkeys(split_paths)))
+    if order == split_paths:
+        return getter
+    # Put the values back in the requested order
+    positions = {path: position for position, path in enumerate(order)}
+    reorder = operator.itemgetter(*(positions[path] for path in split_paths))
+    if len(split_paths) == 1:
+        return lambda msg: (reorder(getter(msg)),)
+    return lambda msg: reorder(getter(msg))
@@ -7,10 +7,7 @@ from pathlib import Path
 
 
 def parse_logfile(log: Path) -> LogStream:
-    log_bytes = b""
-    with open(log, "rb") as f:
-        log_bytes = f.read()
-    return LogStream(log_bytes)
+    return LogStream.from_path(log)
 
 
 def main(logfile_path, output_mcap_path):
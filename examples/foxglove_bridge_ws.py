@@ -2,7 +2,7 @@
 import time
 import logging
 
-from blueye.sdk import Drone
+from blueye.sdk import AsyncDrone
 
 import asyncio
 import time
@@ -30,15 +30,13 @@ logger_sdk.setLevel(logging.DEBUG)
 logger_sdk.addHandler(handler)
 
 
-def parse_message(payload_msg_name, data):
+async def parse_message(payload_msg_name, data):
     global global_server
     global channel_ids
 
     if payload_msg_name in channel_ids:
         try:
-            asyncio.run(
-                global_server.send_message(channel_ids[payload_msg_name], time.time_ns(), data)
-            )
+            await global_server.send_message(channel_ids[payload_msg_name], time.time_ns(), data)
         except TypeError as e:
             logger.info(f"Error sending message for {payload_msg_name}: {e}")
     else:
@@ -100,8 +98,8 @@ def get_protobuf_descriptors(namespace):
 
 async def main():
     # Initialize the drone
-    myDrone = Drone(connect_as_observer=True)
-    myDrone.telemetry.add_msg_callback([], parse_message, raw=True)
+    myDrone = AsyncDrone()
+    await myDrone.connect(connect_as_observer=True)
 
     # Specify the server's host, port, and a human-readable name
     async with FoxgloveServer("0.0.0.0", 8765, "Blueye SDK bridge") as server:
@@ -128,9 +126,10 @@ async def main():
         for name, chan_id in channel_ids.items():
             logger.info(f"Registered topic: blueye.protocol.{name}")
 
-        # Keep the server running
-        while True:
-            await asyncio.sleep(1)
+        # Forward telemetry messages until the script is stopped
+        async with myDrone.subscribe([], raw=True) as telemetry:
+            async for payload_msg_name, data in telemetry:
+                await parse_message(payload_msg_name, data)
 
 
 if __name__ == "__main__":
@@ -15,13 +15,10 @@ def parse_to_dataframe(log: LogFile | Path) -> pd.DataFrame:
     Returns:
         pd.DataFrame: The dataframe with columns rt, delta, meta, message
     """
-    log_bytes = b""
     if isinstance(log, Path):
-        with open(log, "rb") as f:
-            log_bytes = f.read()
+        log_stream = LogStream.from_path(log)
     else:
-        log_bytes = log.download(write_to_file=False)
-    log_stream = LogStream(log_bytes)
+        log_stream = log.parse_to_stream()
     columns = ["rt", "delta", "meta", "message"]
     return pd.DataFrame.from_records(log_stream, columns=columns)
 
@@ -0,0 +1,194 @@
+import asyncio
+import json
+
+import blueye.protocol as bp
+import pytest
+import zmq
+import zmq.asyncio
+
+from blueye.sdk import AsyncDrone
+
+IP = "127.0.0.1"
+
+
+@pytest.fixture
+def mocked_drone_info(requests_mock):
+    dummy_drone_info = {
+        "features": "lasers,harpoon",
+        "hardware_id": "ea9ac92e1817a1d4",
+        "serial_number": "BYEDP230000",
+        "sw_version": "3.3.1-honister-master",
+    }
+    requests_mock.get(
+        f"http://{IP}/diagnostics/drone_info", content=json.dumps(dummy_drone_info).encode()
+    )
+
+
+async def fake_req_rep_server(socket: zmq.asyncio.Socket, ignored_pings: frozenset):
+    """Answer requests like the drone would, except for the pings numbered in ignored_pings
+
+    A ROUTER socket is used instead of REP so that requests can be left unanswered.
+    """
+    responses = {
+        "PingReq": bp.PingRep(),
+        "ConnectClientReq": bp.ConnectClientRep(client_id=2, client_id_in_control=1),
+        "DisconnectClientReq": bp.DisconnectClientRep(),
+    }
+    ping_count = 0
+    while True:
+        identity, delimiter, topic, _ = await socket.recv_multipart()
+        request_name = topic.decode("utf-8").replace("blueye.protocol.", "")
+        if request_name == "PingReq":
+            ping_count += 1
+            if ping_count in ignored_pings:
+                continue
+        response = responses[request_name]
+        await socket.send_multipart(
+            [
+                identity,
+                delimiter,
+                bytes(response._pb.DESCRIPTOR.full_name, "utf-8"),
+                response.__class__.serialize(response),
+            ]
+        )
+
+
+def run_with_fake_drone(test_coroutine, ignored_pings: frozenset = frozenset()):
+    async def runner():
+        context = zmq.asyncio.Context()
+        router_socket = context.socket(zmq.ROUTER)
+        router_socket.bind(f"tcp://{IP}:5556")
+        pub_socket = context.socket(zmq.PUB)
+        pub_socket.bind(f"tcp://{IP}:5555")
+        server = asyncio.create_task(fake_req_rep_server(router_socket, ignored_pings))
+        try:
+            await test_coroutine(AsyncDrone(ip=IP, context=context), pub_socket)
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+            context.destroy(linger=0)
+
+    asyncio.run(runner())
+
+
+def test_connect_and_disconnect(mocked_drone_info):
+    async def check(drone, pub_socket):
+        await drone.connect(connect_as_observer=True)
+        assert drone.connected
+        assert drone.client_id == 2
+        assert drone.in_control is False
+        assert drone.software_version_short == "3.3.1"
+        await drone.disconnect()
+        assert not drone.connected
+
+    run_with_fake_drone(check)
+
+
+def test_subscription_receives_telemetry(mocked_drone_info):
+    async def check(drone, pub_socket):
+        await drone.connect(connect_as_observer=True)
+        depth_tel = bp.DepthTel(depth={"value": 3.0})
+        async with drone.subscribe([bp.DepthTel]) as depth_messages:
+            # Publish until the subscriber has joined
+            for _ in range(50):
+                await pub_socket.send_multipart(
+                    [b"blueye.protocol.DepthTel", bp.DepthTel.serialize(depth_tel)]
+                )
+                await asyncio.sleep(0.01)
+                if not depth_messages._queue.empty():
+                    break
+            msg_type_name, msg = await asyncio.wait_for(depth_messages.__anext__(), 1)
+        assert msg_type_name == "DepthTel"
+        assert msg == depth_tel
+        assert drone.get_telemetry(bp.DepthTel) == depth_tel
+        await drone.disconnect()
+
+    run_with_fake_drone(check)
+
+
+def test_request_timeout_does_not_break_later_requests(mocked_drone_info):
+    async def check(drone, pub_socket):
+        await drone.connect(connect_as_observer=True)
+        with pytest.raises(bp.exceptions.ResponseTimeout):
+            await drone.ping(timeout=0.2)
+        await drone.ping(timeout=1)
+        await drone.disconnect()
+
+    # The ping sent when connecting is answered, the next one is not
+    run_with_fake_drone(check, ignored_pings=frozenset({2}))
+
+
+def test_cancelled_request_does_not_break_later_requests(mocked_drone_info):
+    async def check(drone, pub_socket):
+        await drone.connect(connect_as_observer=True)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(drone.ping(timeout=5), 0.1)
+        await drone.ping(timeout=1)
+        await drone.disconnect()
+
+    run_with_fake_drone(check, ignored_pings=frozenset({2}))
+
+
+def test_subscription_drops_oldest_message_when_full():
+    async def check():
+        drone = AsyncDrone(ip=IP)
+        subscription = drone.subscribe([bp.DepthTel], raw=True, maxsize=2)
+        other_subscription = drone.subscribe([bp.Imu1Tel], raw=True)
+        for value in range(3):
+            drone._handle_telemetry_message((b"blueye.protocol.DepthTel", bytes([value])))
+        assert subscription.dropped_messages == 1
+        assert await subscription.__anext__() == ("DepthTel", b"\x01")
+        assert await subscription.__anext__() == ("DepthTel", b"\x02")
+        assert other_subscription._queue.empty()
+        subscription.close()
+        assert subscription not in drone._subscriptions
+
+    asyncio.run(check())
+
+
+def test_close_ends_iteration_of_waiting_consumer():
+    async def check():
+        drone = AsyncDrone(ip=IP)
+        subscription = drone.subscribe([bp.DepthTel], raw=True)
+        drone._handle_telemetry_message((b"blueye.protocol.DepthTel", b"\x01"))
+
+        async def consume():
+            return [msg async for msg in subscription]
+
+        consumer = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        subscription.close()
+        assert await asyncio.wait_for(consumer, 1) == [("DepthTel", b"\x01")]
+
+    asyncio.run(check())
+
+
+def test_subscriptions_are_closed_on_disconnect(mocked_drone_info):
+    async def check(drone, pub_socket):
+        await drone.connect(connect_as_observer=True)
+        subscription = drone.subscribe([bp.DepthTel])
+        consumer = asyncio.create_task(subscription.__anext__())
+        await asyncio.sleep(0.01)
+        await drone.disconnect()
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(consumer, 1)
+        assert subscription.closed
+
+    run_with_fake_drone(check)
+
+
+def test_failing_background_task_is_logged(mocker):
+    async def check():
+        mocked_logger = mocker.patch("blueye.sdk.async_drone.logger")
+        drone = AsyncDrone(ip=IP)
+
+        async def fail():
+            raise RuntimeError("Socket closed")
+
+        drone._start_task(fail(), "watchdog publisher")
+        await asyncio.gather(*drone._tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert mocked_logger.error.called
+        assert "watchdog publisher" in mocked_logger.error.call_args.args[0]
+
+    asyncio.run(check())
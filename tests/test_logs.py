@@ -1,21 +1,26 @@
 import gzip
 import io
 import json
+import os
 from datetime import datetime
 
 import blueye.protocol as bp
 import pytest
+import requests
 from google.protobuf.any_pb2 import Any
 from google.protobuf.internal.encoder import _VarintBytes
 from google.protobuf.timestamp_pb2 import Timestamp
 
+import blueye.sdk.logs
 from blueye.sdk.logs import (
     LegacyLogFile,
     LegacyLogs,
+    LogCache,
     LogFile,
     Logs,
     LogStream,
     StreamingDecompressor,
+    _payload_type_url,
     human_readable_filesize,
     is_gzip_compressed,
 )
@@ -158,6 +163,152 @@ def test_logs_filter(Logs_object_with_two_logs):
     assert len(Logs_object_with_two_logs.filter(lambda log: log.max_depth_magnitude > 50)) == 1
 
 
+def test_dive_info_is_cached_across_refreshes(Logs_object_with_two_logs, requests_mock):
+    Logs_object_with_two_logs.refresh_log_index()
+    Logs_object_with_two_logs.refresh_log_index()
+
+    dive_info_requests = [r for r in requests_mock.request_history if r.path.endswith("dive_info")]
+    assert len(dive_info_requests) == 2
+    assert Logs_object_with_two_logs[0].max_depth_magnitude == 100
+    assert Logs_object_with_two_logs[1].max_depth_magnitude == 10
+
+
+def test_dive_info_of_open_log_is_fetched_again(Logs_object_with_two_logs, requests_mock):
+    index = requests.get("http://192.168.1.101/logs").json()
+    index[1]["is_open"] = True
+    requests_mock.get("http://192.168.1.101/logs", content=json.dumps(index).encode())
+
+    Logs_object_with_two_logs.refresh_log_index()
+    Logs_object_with_two_logs.refresh_log_index()
+
+    dive_info_requests = [r.path for r in requests_mock.request_history if "dive_info" in r.path]
+    assert dive_info_requests.count("/logs/byedp123456_aabbccddeeff1234_00002/dive_info") == 2
+    assert dive_info_requests.count("/logs/byedp123456_aabbccddeeff1234_00001/dive_info") == 1
+
+
+def test_refresh_keeps_existing_log_objects(Logs_object_with_two_logs, requests_mock):
+    first_log = Logs_object_with_two_logs[0]
+    first_log.content = b"downloaded"
+    index = requests.get("http://192.168.1.101/logs").json()
+    index.append(dict(index[1], name="BYEDP123456_aabbccddeeff1234_00003", log_number=3))
+    requests_mock.get("http://192.168.1.101/logs", content=json.dumps(index).encode())
+    requests_mock.get(
+        "http://192.168.1.101/logs/BYEDP123456_aabbccddeeff1234_00003/dive_info",
+        json={"is_dive": True, "start_time": 1691065863, "max_depth_magnitude": 3},
+    )
+
+    Logs_object_with_two_logs.refresh_log_index()
+
+    assert len(Logs_object_with_two_logs) == 3
+    assert Logs_object_with_two_logs[0] is first_log
+    assert first_log.content == b"downloaded"
+    assert Logs_object_with_two_logs[-1].name == "BYEDP123456_aabbccddeeff1234_00003"
+
+
+def test_refresh_updates_grown_and_removed_logs(Logs_object_with_two_logs, requests_mock):
+    second_log = Logs_object_with_two_logs[1]
+    second_log.content = b"partial"
+    index = requests.get("http://192.168.1.101/logs").json()
+    index[1]["binlog_size"] = 4096
+    requests_mock.get("http://192.168.1.101/logs", content=json.dumps(index[1:]).encode())
+
+    Logs_object_with_two_logs.refresh_log_index()
+
+    assert len(Logs_object_with_two_logs) == 1
+    assert Logs_object_with_two_logs[0] is second_log
+    assert second_log.filesize == 4096
+    assert second_log.content is None
+    with pytest.raises(KeyError):
+        Logs_object_with_two_logs["BYEDP123456_aabbccddeeff1234_00001"]
+
+
+def mock_binlog_downloads(requests_mock):
+    for name, size in (("00001", 1024), ("00002", 2048)):
+        requests_mock.get(
+            f"http://192.168.1.101/logs/BYEDP123456_aabbccddeeff1234_{name}/binlog",
+            content=b"x" * size,
+        )
+
+
+def test_logs_download_all(Logs_object_with_two_logs, requests_mock, tmp_path):
+    mock_binlog_downloads(requests_mock)
+    progress = []
+
+    summary = Logs_object_with_two_logs.download_all(
+        tmp_path / "logs",
+        max_workers=2,
+        progress_callback=lambda done, total: progress.append(total),
+    )
+
+    assert sorted(path.name for path in summary.downloaded) == [
+        "BYEDP123456_aabbccddeeff1234_00001.bez",
+        "BYEDP123456_aabbccddeeff1234_00002.bez",
+    ]
+    assert summary.bytes_downloaded == 3072
+    assert summary.failed == {}
+    assert summary.throughput > 0
+    assert set(progress) == {3072}
+
+
+def test_logs_download_all_skips_existing_logs(Logs_object_with_two_logs, requests_mock, tmp_path):
+    mock_binlog_downloads(requests_mock)
+    (tmp_path / "BYEDP123456_aabbccddeeff1234_00001.bez").write_bytes(b"x" * 1024)
+    (tmp_path / "BYEDP123456_aabbccddeeff1234_00002.bez").write_bytes(b"x" * 10)
+
+    summary = Logs_object_with_two_logs.download_all(tmp_path)
+
+    assert [path.name for path in summary.skipped] == ["BYEDP123456_aabbccddeeff1234_00001.bez"]
+    assert [path.name for path in summary.downloaded] == ["BYEDP123456_aabbccddeeff1234_00002.bez"]
+    assert (tmp_path / "BYEDP123456_aabbccddeeff1234_00002.bez").stat().st_size == 2048
+
+
+def test_logs_download_all_resumes_partial_download(
+    Logs_object_with_two_logs, requests_mock, tmp_path
+):
+    name = "BYEDP123456_aabbccddeeff1234_00002"
+    (tmp_path / f"{name}.bez.part").write_bytes(b"x" * 2000)
+    requests_mock.get(
+        f"http://192.168.1.101/logs/{name}/binlog", content=b"x" * 48, status_code=206
+    )
+    progress = []
+
+    summary = Logs_object_with_two_logs.download_all(
+        tmp_path,
+        filter_func=lambda log: log.name == name,
+        progress_callback=lambda done, total: progress.append((done, total)),
+    )
+
+    assert requests_mock.last_request.headers["Range"] == "bytes=2000-"
+    assert (tmp_path / f"{name}.bez").stat().st_size == 2048
+    # Only the bytes actually transferred are counted
+    assert summary.bytes_downloaded == 48
+    assert progress[-1] == (48, 48)
+
+
+def test_logs_download_all_with_filter_and_failure(
+    Logs_object_with_two_logs, requests_mock, tmp_path
+):
+    requests_mock.get(
+        "http://192.168.1.101/logs/BYEDP123456_aabbccddeeff1234_00001/binlog", status_code=500
+    )
+
+    summary = Logs_object_with_two_logs.download_all(
+        tmp_path, filter_func=lambda log: log.max_depth_magnitude > 50
+    )
+
+    assert summary.downloaded == []
+    assert list(summary.failed) == ["BYEDP123456_aabbccddeeff1234_00001"]
+
+
+def test_logs_download_all_bandwidth_cap(Logs_object_with_two_logs, requests_mock, tmp_path):
+    mock_binlog_downloads(requests_mock)
+
+    summary = Logs_object_with_two_logs.download_all(tmp_path, max_bytes_per_second=10_000)
+
+    # The first chunk is let through immediately, the remaining 1024 bytes have to wait
+    assert summary.duration >= 0.1
+
+
 @pytest.fixture
 def legacy_log_list_with_two_logs(requests_mock, mocker):
     dummy_json = json.dumps(
@@ -388,6 +539,40 @@ class TestStreamingDecompressor:
 
         assert result == original_data
 
+    def test_memoryview_input_and_output(self):
+        """Test that memoryview input is accepted and reads return memoryviews"""
+        original_data = b"Hello, world! This is test data for compression."
+        decompressor = StreamingDecompressor(memoryview(gzip.compress(original_data)))
+
+        chunk = decompressor.read(5)
+
+        assert isinstance(chunk, memoryview)
+        assert chunk == b"Hello"
+        assert decompressor.read(100) == original_data[5:]
+
+    def test_earlier_reads_stay_valid(self):
+        """Test that a returned view is not changed by later reads"""
+        original_data = bytes(range(256)) * 100
+        decompressor = StreamingDecompressor(gzip.compress(original_data), chunk_size=64)
+
+        first = decompressor.read(1000)
+        while decompressor.read(1000):
+            pass
+
+        assert first == original_data[:1000]
+
+    @pytest.mark.parametrize("chunk_size", [1, 16, 1 << 20])
+    def test_chunk_size(self, chunk_size):
+        """Test that the compressed input chunk size does not change the output"""
+        original_data = b"A" * 10000 + b"B" * 10000 + b"C" * 10000
+        decompressor = StreamingDecompressor(gzip.compress(original_data), chunk_size=chunk_size)
+
+        result = bytearray()
+        while chunk := decompressor.read(333):
+            result += chunk
+
+        assert result == original_data
+
 
 class TestLogStream:
     """Test the LogStream class with real protobuf data"""
@@ -509,6 +694,301 @@ class TestLogStream:
         with pytest.raises(StopIteration):
             next(log_stream)
 
+    @pytest.mark.parametrize("read_size", [1, 7, 64, 1 << 16])
+    def test_logstream_records_spanning_read_blocks(self, read_size):
+        """Test that records split across read blocks are framed correctly"""
+        records = [
+            create_real_binlog_record(1690979463 + i, 1000 + i, create_test_depth_message(i))
+            for i in range(20)
+        ]
+        log_stream = LogStream(gzip.compress(b"".join(records)), read_size=read_size)
+
+        depths = [payload_msg.depth.value for _, _, _, payload_msg in log_stream]
+
+        assert depths == list(range(20))
+
+    def test_logstream_truncated_record(self):
+        """Test that a record cut short by the end of the stream stops the iteration"""
+        test_data = self.create_real_protobuf_data()
+        log_stream = LogStream(test_data[:-3], decompress=False)
+
+        assert next(log_stream)[2] == bp.DepthTel
+        with pytest.raises(StopIteration):
+            next(log_stream)
+
+    def test_logstream_skips_many_bad_records(self):
+        """Test that a long run of undecodable records does not exhaust the stack"""
+        bad_records = b"\x05hello" * 5000
+        good_record = create_real_binlog_record(1690979463, 1000, create_test_depth_message(1.5))
+        log_stream = LogStream(bad_records + good_record, decompress=False)
+
+        assert next(log_stream)[3].depth.value == 1.5
+
+
+class TestLogStreamTypeFilter:
+    """Test filtering the records of a LogStream by message type"""
+
+    def create_log(self):
+        records = [
+            create_real_binlog_record(1690979463, 1000, create_test_attitude_message(1, 2, 3)),
+            create_real_binlog_record(1690979464, 1100, create_test_depth_message(1.5)),
+            create_real_binlog_record(1690979465, 1200, create_test_battery_message(0.5)),
+            create_real_binlog_record(1690979466, 1300, create_test_depth_message(2.5)),
+        ]
+        return gzip.compress(b"".join(records))
+
+    def test_only_selected_types_are_returned(self):
+        records = list(LogStream(self.create_log(), types=[bp.DepthTel]))
+
+        assert [record[2] for record in records] == [bp.DepthTel, bp.DepthTel]
+        assert [record[3].depth.value for record in records] == [1.5, 2.5]
+        # Time since start is relative to the first record in the log, even if it is skipped
+        assert records[0][1].total_seconds() == 100
+
+    def test_skipped_records_are_not_deserialized(self, mocker):
+        spy = mocker.spy(blueye.sdk.logs, "deserialize_any_to_message")
+
+        records = list(LogStream(self.create_log(), types=[bp.BatteryTel]))
+
+        assert len(records) == 1
+        assert spy.call_count == 1
+
+    def test_raw_pb_records(self):
+        records = list(LogStream(self.create_log(), types=[bp.DepthTel], raw_pb=True))
+
+        assert [type(record[3]) for record in records] == [bp.DepthTel.pb(), bp.DepthTel.pb()]
+        assert [record[3].depth.value for record in records] == [1.5, 2.5]
+
+    def test_payload_type_url_is_read_from_serialized_record(self):
+        record = create_real_binlog_record(1690979463, 1000, create_test_depth_message(1.5))
+        record_data = record[1:]  # Strip the one byte length prefix
+
+        assert _payload_type_url(record_data) == b"type.googleapis.com/blueye.protocol.DepthTel"
+        assert _payload_type_url(b"\xff") is None
+
+
+class TestLogStreamToColumns:
+    """Test collecting log records into NumPy columns"""
+
+    def create_log(self):
+        records = [
+            create_real_binlog_record(1690979463, 1000, create_test_depth_message(1.5)),
+            create_real_binlog_record(1690979464, 1100, create_test_attitude_message(1, 2, 3)),
+            create_real_binlog_record(1690979465, 1200, create_test_depth_message(2.5)),
+        ]
+        return gzip.compress(b"".join(records))
+
+    def test_to_columns_with_types(self):
+        np = pytest.importorskip("numpy")
+
+        tables = LogStream(self.create_log()).to_columns(types=[bp.DepthTel, bp.BatteryTel])
+
+        assert list(tables) == [bp.DepthTel, bp.BatteryTel]
+        depth = tables[bp.DepthTel]
+        np.testing.assert_array_equal(depth["depth.value"], [1.5, 2.5])
+        np.testing.assert_array_equal(depth["unix_timestamp"], [1690979463, 1690979465])
+        np.testing.assert_array_equal(depth["time_since_start"], [0, 200])
+        assert len(tables[bp.BatteryTel]["battery.level"]) == 0
+
+    def test_to_columns_with_all_types(self):
+        np = pytest.importorskip("numpy")
+
+        tables = LogStream(self.create_log()).to_columns()
+
+        assert set(tables) == {bp.DepthTel, bp.AttitudeTel}
+        attitude = tables[bp.AttitudeTel]
+        assert set(attitude) == {
+            "unix_timestamp",
+            "time_since_start",
+            "attitude.roll",
+            "attitude.pitch",
+            "attitude.yaw",
+        }
+        assert attitude["attitude.yaw"].dtype == np.float64
+        np.testing.assert_array_equal(attitude["attitude.yaw"], [3])
+
+
+class TestLogStreamFromPath:
+    """Test creating a LogStream from a file on disk"""
+
+    def test_from_path_with_gzip_compressed_file(self, tmp_path):
+        records = create_real_binlog_record(
+            1690979463, 1000, create_test_depth_message(5.25)
+        ) + create_real_binlog_record(1690979464, 1100, create_test_battery_message(0.87))
+        log_path = tmp_path / "log.bez"
+        log_path.write_bytes(gzip.compress(records))
+
+        payload_types = [payload_type for _, _, payload_type, _ in LogStream.from_path(log_path)]
+
+        assert payload_types == [bp.DepthTel, bp.BatteryTel]
+
+    def test_from_path_with_uncompressed_file(self, tmp_path):
+        log_path = tmp_path / "log.bin"
+        log_path.write_bytes(
+            create_real_binlog_record(1690979463, 1000, create_test_depth_message(5.25))
+        )
+
+        log_stream = LogStream.from_path(str(log_path), decompress=False)
+
+        assert next(log_stream)[3].depth.value == 5.25
+        with pytest.raises(StopIteration):
+            next(log_stream)
+
+    def test_from_path_with_empty_file(self, tmp_path):
+        log_path = tmp_path / "empty.bez"
+        log_path.touch()
+
+        with pytest.raises(StopIteration):
+            next(LogStream.from_path(log_path))
+
+
+class TestLogFileDownload:
+    """Test downloading binary logs from the drone"""
+
+    log_content = bytes(range(256)) * 10
+    download_url = "http://192.168.1.101/logs/test_log/binlog"
+
+    @pytest.fixture
+    def log_file(self):
+        return LogFile("test_log", True, len(self.log_content), 1690979463, 5, "192.168.1.101")
+
+    def serve_with_range_support(self, request, context):
+        range_header = request.headers.get("Range")
+        if range_header is None:
+            return self.log_content
+        start = int(range_header.removeprefix("bytes=").removesuffix("-"))
+        if start >= len(self.log_content):
+            context.status_code = 416
+            return b""
+        context.status_code = 206
+        return self.log_content[start:]
+
+    def test_download_to_file_reports_progress(self, requests_mock, log_file, tmp_path):
+        requests_mock.get(self.download_url, content=self.log_content)
+        progress = []
+
+        output_path = log_file.download_to_file(
+            tmp_path, chunk_size=1000, progress_callback=lambda done, total: progress.append(done)
+        )
+
+        assert output_path == tmp_path / "test_log.bez"
+        assert output_path.read_bytes() == self.log_content
+        assert progress == [1000, 2000, 2560]
+        assert not (tmp_path / "test_log.bez.part").exists()
+
+    def test_download_to_file_resumes_partial_download(self, requests_mock, log_file, tmp_path):
+        requests_mock.get(self.download_url, content=self.serve_with_range_support)
+        (tmp_path / "test_log.bez.part").write_bytes(self.log_content[:1000])
+
+        output_path = log_file.download_to_file(tmp_path)
+
+        assert requests_mock.last_request.headers["Range"] == "bytes=1000-"
+        assert output_path.read_bytes() == self.log_content
+
+    def test_download_to_file_with_complete_partial_file(self, requests_mock, log_file, tmp_path):
+        requests_mock.get(self.download_url, content=self.serve_with_range_support)
+        (tmp_path / "test_log.bez.part").write_bytes(self.log_content)
+
+        assert log_file.download_to_file(tmp_path).read_bytes() == self.log_content
+
+    def test_download_to_file_restarts_without_range_support(
+        self, requests_mock, log_file, tmp_path
+    ):
+        requests_mock.get(self.download_url, content=self.log_content)
+        (tmp_path / "test_log.bez.part").write_bytes(b"stale data")
+
+        assert log_file.download_to_file(tmp_path).read_bytes() == self.log_content
+
+    def test_download_to_file_keeps_incomplete_download(self, requests_mock, log_file, tmp_path):
+        requests_mock.get(self.download_url, content=self.log_content[:1000])
+
+        with pytest.raises(ConnectionError):
+            log_file.download_to_file(tmp_path)
+
+        assert not (tmp_path / "test_log.bez").exists()
+        assert (tmp_path / "test_log.bez.part").read_bytes() == self.log_content[:1000]
+
+    def test_download_without_writing_to_file(self, requests_mock, log_file):
+        requests_mock.get(self.download_url, content=self.log_content)
+
+        assert log_file.download(write_to_file=False) == self.log_content
+        assert log_file.download(write_to_file=False) == self.log_content
+        assert requests_mock.call_count == 1
+
+    def test_download_writes_to_file(self, requests_mock, log_file, tmp_path):
+        requests_mock.get(self.download_url, content=self.log_content)
+
+        assert log_file.download(output_path=tmp_path / "my_log.bez") == self.log_content
+        assert (tmp_path / "my_log.bez").read_bytes() == self.log_content
+
+
+class TestLogCache:
+    """Test the persistent log cache"""
+
+    download_url = "http://192.168.1.101/logs/test_log/binlog"
+
+    @pytest.fixture
+    def log_content(self):
+        return gzip.compress(
+            create_real_binlog_record(1690979463, 1000, create_test_depth_message(5.25))
+        )
+
+    @pytest.fixture
+    def log_file(self, log_content, tmp_path):
+        cache = LogCache(tmp_path / "cache")
+        return LogFile("test_log", True, len(log_content), 1690979463, 5, "192.168.1.101", cache)
+
+    def test_download_is_served_from_cache(self, requests_mock, log_file, log_content):
+        requests_mock.get(self.download_url, content=log_content)
+
+        assert log_file.download(write_to_file=False) == log_content
+        log_file.content = None  # Simulate a new session
+        assert log_file.download(write_to_file=False) == log_content
+
+        assert requests_mock.call_count == 1
+        assert log_file.cache.get("test_log", len(log_content)).read_bytes() == log_content
+
+    def test_overwrite_cache_downloads_again(self, requests_mock, log_file, log_content):
+        requests_mock.get(self.download_url, content=log_content)
+
+        log_file.download(write_to_file=False)
+        log_file.download(write_to_file=False, overwrite_cache=True)
+
+        assert requests_mock.call_count == 2
+
+    def test_parse_to_stream_reads_cached_file(self, requests_mock, log_file, log_content):
+        requests_mock.get(self.download_url, content=log_content)
+
+        assert next(log_file.parse_to_stream())[3].depth.value == 5.25
+        assert next(log_file.parse_to_stream())[3].depth.value == 5.25
+        assert requests_mock.call_count == 1
+        assert log_file.content is None
+
+    def test_changed_size_is_a_cache_miss(self, log_file, log_content):
+        log_file.cache.directory.joinpath(f"test_log_{len(log_content)}.bez").write_bytes(b"x")
+
+        assert log_file.cache.get("test_log", len(log_content)) is not None
+        assert log_file.cache.get("test_log", len(log_content) + 1) is None
+
+    def test_least_recently_used_logs_are_evicted(self, tmp_path):
+        cache = LogCache(tmp_path, max_size=250)
+        for index, name in enumerate(["a", "b", "c"]):
+            path = tmp_path / f"{name}_100.bez"
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (index, index))
+        cache.get("a", 100)  # Mark a as recently used
+
+        cache.evict()
+
+        assert sorted(path.name for path in tmp_path.glob("*.bez")) == ["a_100.bez", "c_100.bez"]
+
+    def test_cache_is_set_on_existing_logs(self, Logs_object_with_two_logs, tmp_path):
+        cache = LogCache(tmp_path)
+        Logs_object_with_two_logs.cache = cache
+
+        assert all(log.cache is cache for log in Logs_object_with_two_logs)
+        assert Logs_object_with_two_logs[:1][0].cache is cache
+
 
 class TestLogFileParseToStream:
     """Test LogFile.parse_to_stream method"""
@@ -102,6 +102,17 @@ def test_get_status_returns_mission_status(mocked_drone):
     assert mocked_drone.mission.get_status() == mission_status
 
 
+def test_get_status_returns_a_copy(mocked_drone):
+    mission_status_tel = bp.MissionStatusTel(
+        mission_status={"state": bp.MissionState.MISSION_STATE_READY}
+    )
+    mocked_drone.telemetry.get.return_value = mission_status_tel
+
+    mocked_drone.mission.get_status().state = bp.MissionState.MISSION_STATE_RUNNING
+
+    assert mission_status_tel.mission_status.state == bp.MissionState.MISSION_STATE_READY
+
+
 def test_get_active_returns_active_mission(mocked_drone):
     mocked_drone._req_rep_client.get_active_mission.return_value = bp.GetMissionRep(
         mission=example_mission
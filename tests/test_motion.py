@@ -24,8 +24,11 @@ def test_slow_setter_produces_correct_motion_input_arguments(mocked_drone):
 
 
 def test_auto_heading_returns_expected_value(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.ControlModeTel] = bp.ControlModeTel.serialize(
-        bp.ControlModeTel(state=bp.ControlMode(auto_heading=True))
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.ControlModeTel",
+            bp.ControlModeTel.serialize(bp.ControlModeTel(state=bp.ControlMode(auto_heading=True))),
+        )
     )
     assert mocked_drone.motion.auto_heading_active is True
 
@@ -40,8 +43,11 @@ def test_auto_heading_produces_correct_control_message(mocked_drone):
 
 
 def test_auto_depth_returns_expected_value(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.ControlModeTel] = bp.ControlModeTel.serialize(
-        bp.ControlModeTel(state=bp.ControlMode(auto_depth=True))
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.ControlModeTel",
+            bp.ControlModeTel.serialize(bp.ControlModeTel(state=bp.ControlMode(auto_depth=True))),
+        )
     )
     assert mocked_drone.motion.auto_depth_active is True
 
@@ -56,8 +62,13 @@ def test_auto_depth_production_correct_control_message(mocked_drone):
 
 
 def test_auto_altitude_returns_expected_value(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.ControlModeTel] = bp.ControlModeTel.serialize(
-        bp.ControlModeTel(state=bp.ControlMode(auto_altitude=True))
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.ControlModeTel",
+            bp.ControlModeTel.serialize(
+                bp.ControlModeTel(state=bp.ControlMode(auto_altitude=True))
+            ),
+        )
     )
     assert mocked_drone.motion.auto_altitude_active is True
 
@@ -72,8 +83,13 @@ def test_auto_altitude_produces_correct_control_message(mocked_drone):
 
 
 def test_station_keeping_returns_expected_value(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.ControlModeTel] = bp.ControlModeTel.serialize(
-        bp.ControlModeTel(state=bp.ControlMode(station_keeping=True))
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.ControlModeTel",
+            bp.ControlModeTel.serialize(
+                bp.ControlModeTel(state=bp.ControlMode(station_keeping=True))
+            ),
+        )
     )
     assert mocked_drone.motion.station_keeping_active is True
 
@@ -88,8 +104,13 @@ def test_station_keeping_produces_correct_control_message(mocked_drone):
 
 
 def test_weather_vaning_returns_expected_value(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.ControlModeTel] = bp.ControlModeTel.serialize(
-        bp.ControlModeTel(state=bp.ControlMode(weather_vaning=True))
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.ControlModeTel",
+            bp.ControlModeTel.serialize(
+                bp.ControlModeTel(state=bp.ControlMode(weather_vaning=True))
+            ),
+        )
     )
     assert mocked_drone.motion.weather_vaning_active is True
 
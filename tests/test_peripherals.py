@@ -38,7 +38,7 @@ def test_laser_peripheral(mocked_drone):
     mocked_drone._ctrl_client.set_laser_intensity.assert_called_once_with(0.5)
     laser_tel = bp.LaserTel(laser=bp.Laser(value=1))
     laser_tel_msg = bp.LaserTel.serialize(laser_tel)
-    mocked_drone._telemetry_watcher._state[bp.LaserTel] = laser_tel_msg
+    mocked_drone._telemetry_watcher._handle_message((b"blueye.protocol.LaserTel", laser_tel_msg))
     assert mocked_drone.laser.get_intensity() == 1
     with pytest.raises(ValueError):
         mocked_drone.laser.set_intensity(2)
@@ -79,7 +79,9 @@ def test_generic_servo_get_angle(mocked_drone):
     telemetry_msg = bp.GenericServoTel.serialize(
         bp.GenericServoTel(servo=bp.GenericServo(value=30))
     )
-    mocked_drone._telemetry_watcher._state[bp.GenericServoTel] = telemetry_msg
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.GenericServoTel", telemetry_msg)
+    )
 
     # Test getting angle
     assert generic_servo.get_angle() == 30
@@ -123,7 +125,9 @@ def test_skid_servo_get_angle(mocked_drone):
     telemetry_msg = bp.MultibeamServoTel.serialize(
         bp.MultibeamServoTel(servo=bp.MultibeamServo(angle=15))
     )
-    mocked_drone._telemetry_watcher._state[bp.MultibeamServoTel] = telemetry_msg
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.MultibeamServoTel", telemetry_msg)
+    )
 
     # Test getting angle
     assert skid_servo.get_angle() == 15
@@ -0,0 +1,97 @@
+import blueye.protocol as bp
+import pytest
+
+import blueye.sdk.connection
+from blueye.sdk.recorder import TelemetryRecorder
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def telemetry_client():
+    class OnlyIpDrone:
+        _ip = "localhost"
+
+    telemetry_client = blueye.sdk.connection.TelemetryClient(parent_drone=OnlyIpDrone())
+    yield telemetry_client
+    telemetry_client._socket.close()
+
+
+def send_depth(telemetry_client, depth):
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": depth}))
+    telemetry_client._handle_message((b"blueye.protocol.DepthTel", depth_tel))
+
+
+def test_selected_fields_are_recorded(mocker, telemetry_client):
+    mocker.patch("blueye.sdk.recorder.time.time", return_value=100.0)
+    recorder = TelemetryRecorder({bp.DepthTel: ["depth.value"]})
+    recorder.attach(telemetry_client)
+    send_depth(telemetry_client, 1.5)
+    send_depth(telemetry_client, 2.5)
+
+    snapshot = recorder.snapshot(bp.DepthTel)
+
+    assert list(snapshot) == ["unix_timestamp", "depth.value"]
+    np.testing.assert_array_equal(snapshot["depth.value"], [1.5, 2.5])
+    np.testing.assert_array_equal(snapshot["unix_timestamp"], [100.0, 100.0])
+
+
+def test_wildcards_and_all_fields():
+    recorder = TelemetryRecorder({bp.AttitudeTel: ["attitude.*"], bp.Imu1Tel: None})
+    assert recorder.fields[bp.AttitudeTel] == ["attitude.roll", "attitude.pitch", "attitude.yaw"]
+    assert "imu.gyroscope.z" in recorder.fields[bp.Imu1Tel]
+
+
+def test_unknown_field_raises_value_error():
+    with pytest.raises(ValueError):
+        TelemetryRecorder({bp.DepthTel: ["depth.unknown"]})
+
+
+@pytest.mark.parametrize("fields", [{}, []])
+def test_no_message_types_raises_value_error(fields):
+    with pytest.raises(ValueError):
+        TelemetryRecorder(fields)
+
+
+def test_arrays_grow_and_snapshots_are_zero_copy_views(telemetry_client):
+    recorder = TelemetryRecorder([bp.DepthTel], initial_capacity=2)
+    recorder.attach(telemetry_client)
+    send_depth(telemetry_client, 1.0)
+    first_snapshot = recorder.snapshot(bp.DepthTel)
+    assert np.shares_memory(
+        first_snapshot["depth.value"], recorder.snapshot(bp.DepthTel)["depth.value"]
+    )
+    for depth in (2.0, 3.0, 4.0, 5.0):
+        send_depth(telemetry_client, depth)
+
+    np.testing.assert_array_equal(first_snapshot["depth.value"], [1.0])
+    np.testing.assert_array_equal(
+        recorder.snapshot(bp.DepthTel)["depth.value"], [1.0, 2.0, 3.0, 4.0, 5.0]
+    )
+    with pytest.raises(ValueError):
+        first_snapshot["depth.value"][0] = 0
+
+
+def test_other_message_types_are_not_recorded(telemetry_client):
+    recorder = TelemetryRecorder([bp.Imu1Tel])
+    recorder.attach(telemetry_client)
+    send_depth(telemetry_client, 1.0)
+    assert len(recorder.snapshot(bp.Imu1Tel)["imu.temperature"]) == 0
+    with pytest.raises(KeyError):
+        recorder.snapshot(bp.DepthTel)
+
+
+def test_detach_and_clear(telemetry_client):
+    recorder = TelemetryRecorder([bp.DepthTel])
+    recorder.attach(telemetry_client)
+    with pytest.raises(RuntimeError):
+        recorder.attach(telemetry_client)
+    send_depth(telemetry_client, 1.0)
+    recorder.detach()
+    send_depth(telemetry_client, 2.0)
+    snapshot = recorder.snapshot(bp.DepthTel)
+    np.testing.assert_array_equal(snapshot["depth.value"], [1.0])
+
+    recorder.clear()
+    assert len(recorder.snapshot(bp.DepthTel)["depth.value"]) == 0
+    np.testing.assert_array_equal(snapshot["depth.value"], [1.0])
@@ -1,5 +1,9 @@
+import threading
+import time
+
 import blueye.protocol as bp
 import pytest
+import zmq
 
 import blueye.sdk
 
@@ -7,3 +11,139 @@ import blueye.sdk
 @pytest.mark.parametrize("message", [bp.DepthTel, "blueye.protocol.DepthTel"])
 def test_parse_to_type(message):
     assert blueye.sdk.connection.ReqRepClient._parse_type_to_string(message) == "DepthTel"
+
+
+class OnlyIpDrone:
+    _ip = "127.0.0.1"
+
+
+@pytest.fixture
+def fake_drone_rep_socket():
+    """A REP socket answering ping requests like the drone, with an optional delay per request"""
+    context = zmq.Context()
+    socket = context.socket(zmq.REP)
+    socket.bind("tcp://127.0.0.1:5556")
+    delays = []
+    exit_flag = threading.Event()
+
+    def serve():
+        poller = zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        while not exit_flag.is_set():
+            if not poller.poll(10):
+                continue
+            socket.recv_multipart()
+            if delays:
+                time.sleep(delays.pop(0))
+            socket.send_multipart([b"blueye.protocol.PingRep", bp.PingRep.serialize(bp.PingRep())])
+
+    server = threading.Thread(target=serve, daemon=True)
+    server.start()
+    yield delays
+    exit_flag.set()
+    server.join()
+    context.destroy(linger=0)
+
+
+@pytest.fixture
+def pipelined_client(fake_drone_rep_socket):
+    client = blueye.sdk.connection.ReqRepClient(OnlyIpDrone(), pipelined=True)
+    client.start()
+    yield client
+    client.stop()
+    client.join()
+
+
+def test_pipelined_requests_can_be_in_flight_concurrently(pipelined_client):
+    futures = [pipelined_client.send_request(bp.PingReq(), bp.PingRep, timeout=1) for _ in range(5)]
+    for future in futures:
+        assert pipelined_client.wait_for_response(future, timeout=1) == bp.PingRep()
+    assert pipelined_client._pending_requests == {}
+
+
+def test_pipelined_timeout_drops_late_response(fake_drone_rep_socket, pipelined_client):
+    fake_drone_rep_socket.append(0.3)
+    with pytest.raises(bp.exceptions.ResponseTimeout):
+        pipelined_client.ping(timeout=0.1)
+    assert pipelined_client._pending_requests == {}
+    assert pipelined_client.ping(timeout=1) == bp.PingRep()
+
+
+def test_pipelined_request_expires_without_waiting(fake_drone_rep_socket, pipelined_client):
+    fake_drone_rep_socket.append(0.3)
+    future = pipelined_client.send_request(bp.PingReq(), bp.PingRep, timeout=0.1)
+    with pytest.raises(bp.exceptions.ResponseTimeout):
+        # The deadline is enforced by the client, not by waiting on the future
+        future.result(timeout=1)
+    assert pipelined_client._pending_requests == {}
+
+
+def test_pipelined_client_stops_promptly(fake_drone_rep_socket):
+    client = blueye.sdk.connection.ReqRepClient(OnlyIpDrone(), pipelined=True)
+    client.start()
+    client.stop()
+    client.join(timeout=1)
+    assert not client.is_alive()
+
+
+@pytest.fixture
+def req_client(fake_drone_rep_socket):
+    client = blueye.sdk.connection.ReqRepClient(OnlyIpDrone())
+    client.start()
+    yield client
+    client.stop()
+    client.join()
+
+
+def test_req_socket_is_recreated_after_timeout(fake_drone_rep_socket, req_client):
+    fake_drone_rep_socket.append(0.3)
+    with pytest.raises(bp.exceptions.ResponseTimeout):
+        req_client.ping(timeout=0.1)
+    assert req_client.ping(timeout=1) == bp.PingRep()
+    assert req_client.socket_recoveries == 1
+
+
+def test_req_requests_succeed_without_recovery(req_client):
+    for _ in range(3):
+        assert req_client.ping(timeout=1) == bp.PingRep()
+    assert req_client.socket_recoveries == 0
+
+
+def test_req_request_expired_in_queue_is_not_sent(fake_drone_rep_socket, req_client):
+    fake_drone_rep_socket.append(0.3)
+    first_future = req_client.send_request(bp.PingReq(), bp.PingRep, timeout=1)
+    # Queued behind the slow request until after its deadline
+    expired_future = req_client.send_request(bp.PingReq(), bp.PingRep, timeout=0.1)
+    assert first_future.result(timeout=1) == bp.PingRep()
+    with pytest.raises(bp.exceptions.ResponseTimeout):
+        expired_future.result(timeout=1)
+    assert req_client.ping(timeout=1) == bp.PingRep()
+    assert req_client.socket_recoveries == 0
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_sockets_are_closed_when_stopped(pipelined):
+    client = blueye.sdk.connection.ReqRepClient(OnlyIpDrone(), pipelined=pipelined)
+    client.start()
+    client.stop()
+    client.join()
+    assert client._socket.closed
+    if pipelined:
+        assert client._wakeup_receiver.closed
+        assert client._wakeup_sender.closed
+    client.stop()
+
+
+def test_req_socket_is_not_recreated_when_stopped(fake_drone_rep_socket, mocker):
+    mocked_logger = mocker.patch("blueye.sdk.connection.logger")
+    fake_drone_rep_socket.append(0.5)
+    client = blueye.sdk.connection.ReqRepClient(OnlyIpDrone())
+    client.start()
+    future = client.send_request(bp.PingReq(), bp.PingRep, timeout=5)
+    time.sleep(0.1)
+    client.stop()
+    client.join(timeout=1)
+    with pytest.raises(bp.exceptions.ResponseTimeout):
+        future.result(timeout=0)
+    assert client.socket_recoveries == 0
+    mocked_logger.warning.assert_not_called()
@@ -9,13 +9,16 @@ from freezegun import freeze_time
 
 from blueye.sdk import Drone
 from blueye.sdk.camera import Camera
+from blueye.sdk.recorder import TelemetryRecorder
 
 
 class TestLights:
     def test_lights_returns_value(self, mocked_drone):
         lights_tel = bp.LightsTel(lights={"value": 0})
         lights_tel_serialized = lights_tel.__class__.serialize(lights_tel)
-        mocked_drone._telemetry_watcher._state[bp.LightsTel] = lights_tel_serialized
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.LightsTel", lights_tel_serialized)
+        )
         assert mocked_drone.lights == 0
 
 
@@ -26,7 +29,9 @@ class TestPose:
             attitude={"roll": old_angle, "pitch": old_angle, "yaw": old_angle}
         )
         attitude_tel_serialized = attitude_tel.__class__.serialize(attitude_tel)
-        mocked_drone._telemetry_watcher._state[bp.AttitudeTel] = attitude_tel_serialized
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.AttitudeTel", attitude_tel_serialized)
+        )
         pose = mocked_drone.pose
         assert pose["roll"] == new_angle
         assert pose["pitch"] == new_angle
@@ -95,14 +100,18 @@ def test_depth_reading(mocked_drone):
     depth = 10
     depthTel = bp.DepthTel(depth={"value": depth})
     depthTel_serialized = depthTel.__class__.serialize(depthTel)
-    mocked_drone._telemetry_watcher._state[bp.DepthTel] = depthTel_serialized
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.DepthTel", depthTel_serialized)
+    )
     assert mocked_drone.depth == depth
 
 
 def test_error_flags(mocked_drone):
     error_flags_tel = bp.ErrorFlagsTel(error_flags={"depth_read": True})
     error_flags_serialized = error_flags_tel.__class__.serialize(error_flags_tel)
-    mocked_drone._telemetry_watcher._state[bp.ErrorFlagsTel] = error_flags_serialized
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.ErrorFlagsTel", error_flags_serialized)
+    )
     assert mocked_drone.error_flags["depth_read"] == True
 
 
@@ -110,7 +119,7 @@ def test_battery_state_of_charge_reading(mocked_drone):
     SoC = 0.77
     batteryTel = bp.BatteryTel(battery={"level": SoC})
     batteryTel_msg = batteryTel.__class__.serialize(batteryTel)
-    mocked_drone._telemetry_watcher._state[bp.BatteryTel] = batteryTel_msg
+    mocked_drone._telemetry_watcher._handle_message((b"blueye.protocol.BatteryTel", batteryTel_msg))
     assert mocked_drone.battery.state_of_charge == pytest.approx(SoC)
 
 
@@ -138,7 +147,9 @@ def test_update_drone_info_raises_ConnectionError_when_not_connected(
 def test_active_video_streams_return_correct_number(mocked_drone: Drone):
     NStreamersTel = bp.NStreamersTel(n_streamers={"main": 1, "guestport": 2})
     NStreamersTel_serialized = NStreamersTel.__class__.serialize(NStreamersTel)
-    mocked_drone._telemetry_watcher._state[bp.NStreamersTel] = NStreamersTel_serialized
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.NStreamersTel", NStreamersTel_serialized)
+    )
 
     assert mocked_drone.active_video_streams["main"] == 1
     assert mocked_drone.active_video_streams["guestport"] == 2
@@ -182,7 +193,9 @@ class TestTilt:
         mocked_drone.features = ["tilt"]
         TiltAngleTel = bp.TiltAngleTel(angle={"value": expected_angle})
         TiltAngleTel_serialized = bp.TiltAngleTel.serialize(TiltAngleTel)
-        mocked_drone._telemetry_watcher._state[bp.TiltAngleTel] = TiltAngleTel_serialized
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.TiltAngleTel", TiltAngleTel_serialized)
+        )
         assert mocked_drone.camera.tilt.angle == expected_angle
 
     @pytest.mark.parametrize(
@@ -196,8 +209,8 @@ class TestTilt:
         mocked_drone.features = ["tilt"]
         TiltStabilizationTel = bp.TiltStabilizationTel(state={"enabled": expected_state})
         TiltStabilizationTel_serialized = bp.TiltStabilizationTel.serialize(TiltStabilizationTel)
-        mocked_drone._telemetry_watcher._state[bp.TiltStabilizationTel] = (
-            TiltStabilizationTel_serialized
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.TiltStabilizationTel", TiltStabilizationTel_serialized)
         )
         assert mocked_drone.camera.tilt.stabilization_enabled == expected_state
 
@@ -227,8 +240,11 @@ class TestConfig:
 
 
 def test_altitude_is_none_on_invalid_readings(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.AltitudeTel] = bp.AltitudeTel.serialize(
-        bp.AltitudeTel(altitude={"value": 10, "is_valid": False})
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.AltitudeTel",
+            bp.AltitudeTel.serialize(bp.AltitudeTel(altitude={"value": 10, "is_valid": False})),
+        )
     )
     assert mocked_drone.altitude is None
 
@@ -238,8 +254,11 @@ def test_altitude_is_none_on_missing_readings(mocked_drone):
 
 
 def test_altitude_is_correct_on_valid_readings(mocked_drone):
-    mocked_drone._telemetry_watcher._state[bp.AltitudeTel] = bp.AltitudeTel.serialize(
-        bp.AltitudeTel(altitude={"value": 10.5, "is_valid": True})
+    mocked_drone._telemetry_watcher._handle_message(
+        (
+            b"blueye.protocol.AltitudeTel",
+            bp.AltitudeTel.serialize(bp.AltitudeTel(altitude={"value": 10.5, "is_valid": True})),
+        )
     )
     assert mocked_drone.altitude == 10.5
 
@@ -249,17 +268,28 @@ def test_gp_cam_recording(mocked_drone):
     record_state_tel = bp.RecordStateTel(
         record_state={"main_is_recording": False, "guestport_is_recording": False}
     )
-    mocked_drone._telemetry_watcher._state[bp.RecordStateTel] = bp.RecordStateTel.serialize(
-        record_state_tel
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.RecordStateTel", bp.RecordStateTel.serialize(record_state_tel))
     )
     mocked_drone.gp_cam.is_recording = True
     mocked_drone._ctrl_client.set_recording_state.assert_called_with(False, True)
 
 
+def test_connected_clients_are_copies(mocked_drone):
+    clients_tel = bp.ConnectedClientsTel(connected_clients=[{"client_id": 1}])
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.ConnectedClientsTel", bp.ConnectedClientsTel.serialize(clients_tel))
+    )
+    mocked_drone.connected_clients[0].client_id = 5
+    assert mocked_drone.connected_clients[0].client_id == 1
+
+
 class TestTelemetry:
     def test_get(self, mocked_drone):
         depth_tel = bp.DepthTel(depth={"value": 10})
-        mocked_drone._telemetry_watcher._state[bp.DepthTel] = bp.DepthTel.serialize(depth_tel)
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.DepthTel", bp.DepthTel.serialize(depth_tel))
+        )
         assert mocked_drone.telemetry.get(bp.DepthTel) == depth_tel
 
     def test_get_returns_none_if_not_available(self, mocked_drone):
@@ -285,16 +315,51 @@ class TestTelemetry:
     def test_get_deserializer(self, mocked_drone):
         depth_tel = bp.DepthTel(depth={"value": 10})
         depth_tel_serialized = bp.DepthTel.serialize(depth_tel)
-        mocked_drone._telemetry_watcher._state[bp.DepthTel] = depth_tel_serialized
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.DepthTel", depth_tel_serialized)
+        )
         assert mocked_drone.telemetry.get(bp.DepthTel, deserialize=True) == depth_tel
         assert mocked_drone.telemetry.get(bp.DepthTel, deserialize=False) == depth_tel_serialized
 
+    def test_history(self, mocked_drone):
+        mocked_drone.telemetry.enable_history(bp.DepthTel, max_messages=10)
+        depth_tel = bp.DepthTel(depth={"value": 10})
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.DepthTel", bp.DepthTel.serialize(depth_tel))
+        )
+        history = mocked_drone.telemetry.history(bp.DepthTel, seconds=60)
+        assert len(history) == 1
+        assert history[0][1] == depth_tel
+
+    def test_recorder_can_be_attached_again_after_reconnecting(self, mocked_drone):
+        pytest.importorskip("numpy")
+        recorder = TelemetryRecorder([bp.DepthTel])
+        mocked_drone.telemetry.attach_recorder(recorder)
+        mocked_drone.disconnect()
+        mocked_drone.connect()
+        mocked_drone.telemetry.attach_recorder(recorder)
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.DepthTel", bp.DepthTel.serialize(bp.DepthTel(depth={"value": 3})))
+        )
+        assert list(recorder.snapshot(bp.DepthTel)["depth.value"]) == [3]
+
+    def test_get_raw_pb(self, mocked_drone):
+        depth_tel = bp.DepthTel(depth={"value": 10})
+        mocked_drone._telemetry_watcher._handle_message(
+            (b"blueye.protocol.DepthTel", bp.DepthTel.serialize(depth_tel))
+        )
+        msg = mocked_drone.telemetry.get(bp.DepthTel, raw_pb=True)
+        assert isinstance(msg, bp.DepthTel.pb())
+        assert msg.depth.value == 10
+
 
 def test_water_temperature_returns_expected_value(mocked_drone):
     water_temp = 10.5
     water_temp_tel = bp.WaterTemperatureTel(temperature={"value": water_temp})
     water_temp_tel_serialized = bp.WaterTemperatureTel.serialize(water_temp_tel)
-    mocked_drone._telemetry_watcher._state[bp.WaterTemperatureTel] = water_temp_tel_serialized
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.WaterTemperatureTel", water_temp_tel_serialized)
+    )
     assert mocked_drone.water_temperature == water_temp
 
 
@@ -305,7 +370,9 @@ def test_water_temperature_returns_none_on_missing_telemetry(mocked_drone):
 def test_dive_time_returns_expected_value(mocked_drone):
     dive_time_tel = bp.DiveTimeTel(dive_time={"value": 10})
     dive_time_tel_serialized = bp.DiveTimeTel.serialize(dive_time_tel)
-    mocked_drone._telemetry_watcher._state[bp.DiveTimeTel] = dive_time_tel_serialized
+    mocked_drone._telemetry_watcher._handle_message(
+        (b"blueye.protocol.DiveTimeTel", dive_time_tel_serialized)
+    )
     assert mocked_drone.dive_time == 10
 
 
@@ -323,3 +390,69 @@ def test_connect_as_observer(mocked_drone_not_connected):
 def test_connect_as_observer_ignores_diconnect_other_clients(mocked_drone_not_connected):
     mocked_drone_not_connected.connect(disconnect_other_clients=True, connect_as_observer=True)
     mocked_drone_not_connected._req_rep_client.disconnect_client.assert_not_called()
+
+
+class TestFastConnect:
+    def test_pipelined_req_rep_client_is_used(self, mocked_drone, mocked_req_rep_client):
+        mocked_drone.connect(fast_connect=True)
+        assert mocked_drone.connected
+        mocked_req_rep_client.assert_called_with(mocked_drone, pipelined=True)
+
+    def test_connection_timings_are_recorded(self, mocked_drone):
+        mocked_drone.connect(fast_connect=True)
+        assert set(mocked_drone.connection_timings) == {
+            "drone_info",
+            "start_clients",
+            "handshake",
+            "start_control",
+            "post_connect",
+            "total",
+        }
+
+    def test_zmq_connection_error(self, mocked_drone):
+        mocked_drone._req_rep_client.ping.side_effect = bp.exceptions.ResponseTimeout
+        with pytest.raises(ConnectionError):
+            mocked_drone.connect(fast_connect=True)
+
+    def test_fails_on_old_versions(self, mocked_drone, mocked_req_rep_client, requests_mock):
+        requests_mock.get(
+            "http://192.168.1.101/diagnostics/drone_info",
+            content=json.dumps(
+                {"hardware_id": "", "serial_number": "", "sw_version": "1.3.2-rocko-master"}
+            ).encode(),
+        )
+        with pytest.raises(RuntimeError):
+            mocked_drone.connect(fast_connect=True)
+        # The connect request was already sent, so the client has to be disconnected again
+        mocked_req_rep_client.return_value.disconnect_client.assert_called_once_with(1)
+
+    def test_disconnects_if_drone_info_request_fails(
+        self, mocked_drone, mocked_req_rep_client, requests_mock
+    ):
+        requests_mock.get(
+            "http://192.168.1.101/diagnostics/drone_info",
+            exc=requests.exceptions.ConnectTimeout,
+        )
+        with pytest.raises(ConnectionError):
+            mocked_drone.connect(fast_connect=True)
+        mocked_req_rep_client.return_value.disconnect_client.assert_called_once_with(1)
+
+    def test_http_request_overlaps_handshake(self, mocked_drone, requests_mock):
+        import time as time_module
+
+        def slow_drone_info(request, context):
+            time_module.sleep(0.2)
+            return json.dumps(
+                {"hardware_id": "", "serial_number": "", "sw_version": "3.2.62-honister-master"}
+            )
+
+        requests_mock.get("http://192.168.1.101/diagnostics/drone_info", text=slow_drone_info)
+        mocked_drone._req_rep_client.ping.side_effect = lambda timeout: time_module.sleep(0.2)
+
+        mocked_drone.connect(fast_connect=False)
+        sequential_time = mocked_drone.connection_timings["total"]
+        mocked_drone.connect(fast_connect=True)
+        overlapped_time = mocked_drone.connection_timings["total"]
+
+        assert sequential_time >= 0.4
+        assert overlapped_time < 0.35
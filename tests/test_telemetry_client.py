@@ -1,7 +1,11 @@
+import threading
+
 import blueye.protocol as bp
 import pytest
+import zmq
 
 import blueye.sdk
+from blueye.sdk.constants import CallbackOverflowPolicy
 
 
 @pytest.fixture
@@ -16,6 +20,35 @@ def telemetry_client():
     telemetry_client.join()
 
 
+def test_sockets_are_closed_when_stopped():
+    class OnlyIpDrone:
+        _ip = "localhost"
+
+    telemetry_client = blueye.sdk.connection.TelemetryClient(parent_drone=OnlyIpDrone())
+    telemetry_client.start()
+    telemetry_client.stop()
+    telemetry_client.join()
+    assert telemetry_client._socket.closed
+    assert telemetry_client._wakeup_receiver.closed
+    assert telemetry_client._wakeup_sender.closed
+    # Stopping again is harmless
+    telemetry_client.stop()
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_sockets_are_closed_when_thread_fails(mocker):
+    class OnlyIpDrone:
+        _ip = "localhost"
+
+    mocker.patch.object(zmq.Poller, "poll", side_effect=RuntimeError("Receiving failed"))
+    telemetry_client = blueye.sdk.connection.TelemetryClient(parent_drone=OnlyIpDrone())
+    telemetry_client.start()
+    telemetry_client.join()
+    assert telemetry_client._socket.closed
+    assert telemetry_client._wakeup_receiver.closed
+    assert telemetry_client._wakeup_sender.closed
+
+
 def test_telemetry_getter(telemetry_client):
     depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
     msg = (bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel)
@@ -30,6 +63,22 @@ def test_unknown_telemetry_messages_are_ignored(mocker, telemetry_client):
     assert mocked_logger.info.called
 
 
+def test_unknown_telemetry_messages_are_logged_once(mocker, telemetry_client):
+    msg = (bytes("blueye.protocol.AnotherUnknownTel", "utf-8"), b"")
+    mocked_logger = mocker.patch("blueye.sdk.connection.logger")
+    for _ in range(3):
+        telemetry_client._handle_message(msg)
+    assert mocked_logger.info.call_count == 1
+
+
+def test_topic_lookup_returns_type_and_short_name():
+    assert blueye.sdk.utils.message_type_from_topic(b"blueye.protocol.DepthTel") == (
+        bp.DepthTel,
+        "DepthTel",
+    )
+    assert blueye.sdk.utils.message_type_from_topic(b"blueye.protocol.UnknownTel") is None
+
+
 def test_callback_is_called(mocker, telemetry_client):
     callback = mocker.MagicMock()
     telemetry_client.add_callback([bp.DepthTel], callback, raw=False)
@@ -52,3 +101,303 @@ def test_remove_callback_warns_nonexistant_callback(mocker, telemetry_client):
     mocked_logger = mocker.patch("blueye.sdk.connection.logger")
     telemetry_client.remove_callback("not a uuid")
     mocked_logger.warning.assert_called_once()
+
+
+def test_stop_wakes_blocking_receive_loop():
+    class OnlyIpDrone:
+        _ip = "localhost"
+
+    telemetry_client = blueye.sdk.connection.TelemetryClient(parent_drone=OnlyIpDrone())
+    telemetry_client.start()
+    telemetry_client.stop()
+    telemetry_client.join(timeout=1)
+    assert not telemetry_client.is_alive()
+
+
+def test_all_ready_messages_are_handled_in_one_wakeup(mocker, telemetry_client):
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    msg = [bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel]
+    mocked_socket = mocker.patch.object(telemetry_client, "_socket")
+    mocked_socket.recv_multipart.side_effect = [msg, msg, msg, zmq.Again()]
+    mocked_handle_message = mocker.patch.object(telemetry_client, "_handle_message")
+    telemetry_client._drain_socket()
+    assert mocked_handle_message.call_count == 3
+
+
+def test_callbacks_are_dispatched_by_message_type(mocker, telemetry_client):
+    depth_callback = mocker.MagicMock()
+    imu_callback = mocker.MagicMock()
+    wildcard_callback = mocker.MagicMock()
+    telemetry_client.add_callback([bp.DepthTel], depth_callback, raw=True)
+    telemetry_client.add_callback([bp.Imu1Tel], imu_callback, raw=True)
+    telemetry_client.add_callback([], wildcard_callback, raw=True)
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    telemetry_client._handle_message((bytes("blueye.protocol.BatteryTel", "utf-8"), b""))
+    depth_callback.assert_called_once_with("DepthTel", depth_tel)
+    imu_callback.assert_not_called()
+    assert wildcard_callback.call_count == 2
+
+
+def test_removed_callback_is_not_dispatched(mocker, telemetry_client):
+    callback = mocker.MagicMock()
+    callback_id = telemetry_client.add_callback([bp.DepthTel], callback, raw=True)
+    telemetry_client.remove_callback(callback_id)
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    callback.assert_not_called()
+    assert bp.DepthTel not in telemetry_client._callbacks_by_type
+
+
+def test_message_is_deserialized_once_for_all_callbacks(mocker, telemetry_client):
+    first_callback = mocker.MagicMock()
+    second_callback = mocker.MagicMock()
+    telemetry_client.add_callback([bp.DepthTel], first_callback, raw=False)
+    telemetry_client.add_callback([bp.DepthTel], second_callback, raw=False)
+    spy = mocker.spy(bp.DepthTel, "deserialize")
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    assert spy.call_count == 1
+    assert first_callback.call_args.args[1] is second_callback.call_args.args[1]
+
+
+def test_read_only_callback_gets_frozen_message(mocker, telemetry_client):
+    callback = mocker.MagicMock()
+    telemetry_client.add_callback([bp.DepthTel], callback, raw=False, read_only=True)
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    msg = callback.call_args.args[1]
+    assert isinstance(msg, blueye.sdk.utils.FrozenMessage)
+    assert msg.depth.value == 1.0
+    with pytest.raises(AttributeError):
+        msg.depth.value = 2.0
+
+
+def test_raw_pb_callback_gets_protobuf_message(mocker, telemetry_client):
+    raw_pb_callback = mocker.MagicMock()
+    callback = mocker.MagicMock()
+    telemetry_client.add_callback([bp.DepthTel], raw_pb_callback, raw=False, raw_pb=True)
+    telemetry_client.add_callback([bp.DepthTel], callback, raw=False)
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    msg_pb = raw_pb_callback.call_args.args[1]
+    assert isinstance(msg_pb, bp.DepthTel.pb())
+    assert msg_pb.depth.value == 1.0
+    # Both callbacks share the same decoded message
+    assert callback.call_args.args[1]._pb is msg_pb
+
+
+def test_raw_pb_and_read_only_are_mutually_exclusive(mocker, telemetry_client):
+    with pytest.raises(ValueError):
+        telemetry_client.add_callback(
+            [bp.DepthTel], mocker.MagicMock(), raw=False, read_only=True, raw_pb=True
+        )
+
+
+def test_get_deserialized_raw_pb(telemetry_client):
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    msg_pb = telemetry_client.get_deserialized(bp.DepthTel, raw_pb=True)
+    assert isinstance(msg_pb, bp.DepthTel.pb())
+    assert msg_pb is telemetry_client.get_deserialized(bp.DepthTel)._pb
+
+
+def test_deserialized_message_is_cached_until_new_message(mocker, telemetry_client):
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    spy = mocker.spy(bp.DepthTel, "deserialize")
+    first = telemetry_client.get_deserialized(bp.DepthTel)
+    assert telemetry_client.get_deserialized(bp.DepthTel) is first
+    assert spy.call_count == 1
+
+    new_depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 2.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), new_depth_tel))
+    assert telemetry_client.get_deserialized(bp.DepthTel).depth.value == 2.0
+    assert spy.call_count == 2
+
+
+def test_sequence_number_increases_on_receipt(telemetry_client):
+    assert telemetry_client.get_sequence_number(bp.DepthTel) == 0
+    depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+    assert telemetry_client.get_sequence_number(bp.DepthTel) == 2
+
+
+def test_get_deserialized_raises_key_error_for_missing_message(telemetry_client):
+    with pytest.raises(KeyError):
+        telemetry_client.get_deserialized(bp.DepthTel)
+
+
+class TestCallbackWorker:
+    def test_callback_is_called_from_worker_thread(self, telemetry_client):
+        called_from = []
+        done = threading.Event()
+
+        def callback(msg_type_name, msg):
+            called_from.append(threading.current_thread())
+            done.set()
+
+        telemetry_client.add_callback([bp.DepthTel], callback, raw=True, run_in_thread=True)
+        depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+        telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+        assert done.wait(timeout=1)
+        assert isinstance(called_from[0], blueye.sdk.connection.CallbackWorker)
+
+    @pytest.mark.parametrize(
+        "policy, expected_values",
+        [
+            (CallbackOverflowPolicy.drop_oldest, [1, 2]),
+            (CallbackOverflowPolicy.drop_newest, [0, 1]),
+        ],
+    )
+    def test_overflow_policy(self, mocker, policy, expected_values):
+        callback = mocker.MagicMock()
+        worker = blueye.sdk.connection.CallbackWorker(callback, {}, 2, policy)
+        for value in range(3):
+            worker.submit("DepthTel", value)
+        assert worker.dropped_messages == 1
+        assert list(worker._messages_to_handle.queue) == [
+            ("DepthTel", value) for value in expected_values
+        ]
+
+    def test_unknown_overflow_policy_raises(self, mocker):
+        with pytest.raises(ValueError):
+            blueye.sdk.connection.CallbackWorker(mocker.MagicMock(), {}, 2, "unknown")
+
+    def test_dropped_messages_are_counted_per_callback(self, mocker, telemetry_client):
+        inline_id = telemetry_client.add_callback([bp.DepthTel], mocker.MagicMock(), raw=True)
+        threaded_id = telemetry_client.add_callback(
+            [bp.DepthTel], mocker.MagicMock(), raw=True, run_in_thread=True
+        )
+        worker = telemetry_client._callbacks[-1].worker
+        worker.dropped_messages = 3
+        assert telemetry_client.get_dropped_messages(inline_id) == 0
+        assert telemetry_client.get_dropped_messages(threaded_id) == 3
+
+    def test_worker_is_stopped_when_callback_is_removed(self, mocker, telemetry_client):
+        callback_id = telemetry_client.add_callback(
+            [bp.DepthTel], mocker.MagicMock(), raw=True, run_in_thread=True
+        )
+        worker = telemetry_client._callbacks[-1].worker
+        telemetry_client.remove_callback(callback_id)
+        worker.join(timeout=1)
+        assert not worker.is_alive()
+
+
+class TestCallbackDecimation:
+    def test_every_nth_skips_messages_before_deserialization(self, mocker, telemetry_client):
+        callback = mocker.MagicMock()
+        telemetry_client.add_callback([bp.DepthTel], callback, raw=False, every_nth=3)
+        spy = mocker.spy(bp.DepthTel, "deserialize")
+        depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": 1.0}))
+        for _ in range(7):
+            telemetry_client._handle_message(
+                (bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel)
+            )
+        assert callback.call_count == 3
+        assert spy.call_count == 3
+
+    def test_every_nth_counts_each_message_type(self):
+        decimator = blueye.sdk.connection.CallbackDecimator(every_nth=2)
+        assert decimator.accept(bp.DepthTel)
+        assert decimator.accept(bp.Imu1Tel)
+        assert not decimator.accept(bp.DepthTel)
+        assert not decimator.accept(bp.Imu1Tel)
+
+    def test_max_rate_limits_calls(self, mocker):
+        mocked_time = mocker.patch("blueye.sdk.connection.time.monotonic")
+        decimator = blueye.sdk.connection.CallbackDecimator(max_rate_hz=10)
+        mocked_time.return_value = 100.0
+        assert decimator.accept(bp.DepthTel)
+        mocked_time.return_value = 100.05
+        assert not decimator.accept(bp.DepthTel)
+        mocked_time.return_value = 100.2
+        assert decimator.accept(bp.DepthTel)
+
+    @pytest.mark.parametrize("every_nth, max_rate_hz", [(0, None), (1, 0), (1, -5)])
+    def test_invalid_arguments_raise(self, every_nth, max_rate_hz):
+        with pytest.raises(ValueError):
+            blueye.sdk.connection.CallbackDecimator(every_nth, max_rate_hz)
+
+    def test_latest_only_uses_single_slot_worker(self, mocker, telemetry_client):
+        telemetry_client.add_callback([bp.DepthTel], mocker.MagicMock(), raw=True, latest_only=True)
+        worker = telemetry_client._callbacks[-1].worker
+        assert worker._messages_to_handle.maxsize == 1
+        assert worker._overflow_policy == CallbackOverflowPolicy.drop_oldest
+
+
+class TestMessageHistory:
+    def test_messages_are_returned_oldest_first(self):
+        history = blueye.sdk.connection.MessageHistory(3)
+        for i in range(2):
+            history.append(float(i), bytes([i]))
+        assert history.snapshot() == ([0.0, 1.0], [b"\x00", b"\x01"])
+
+    def test_oldest_messages_are_overwritten(self):
+        history = blueye.sdk.connection.MessageHistory(3)
+        for i in range(5):
+            history.append(float(i), bytes([i]))
+        assert len(history) == 3
+        assert history.snapshot() == ([2.0, 3.0, 4.0], [b"\x02", b"\x03", b"\x04"])
+
+    def test_snapshot_since(self):
+        history = blueye.sdk.connection.MessageHistory(3)
+        for i in range(5):
+            history.append(float(i), bytes([i]))
+        assert history.snapshot(since=3.0) == ([3.0, 4.0], [b"\x03", b"\x04"])
+        assert history.snapshot(since=10.0) == ([], [])
+
+    def test_max_messages_must_be_positive(self):
+        with pytest.raises(ValueError):
+            blueye.sdk.connection.MessageHistory(0)
+
+
+class TestTelemetryHistory:
+    def send_depth(self, telemetry_client, depth):
+        depth_tel = bp.DepthTel.serialize(bp.DepthTel(depth={"value": depth}))
+        telemetry_client._handle_message((bytes("blueye.protocol.DepthTel", "utf-8"), depth_tel))
+
+    def test_history_is_only_kept_when_enabled(self, telemetry_client):
+        self.send_depth(telemetry_client, 1.0)
+        with pytest.raises(KeyError):
+            telemetry_client.get_history(bp.DepthTel)
+        telemetry_client.enable_history(bp.DepthTel, max_messages=2)
+        for depth in (2.0, 3.0, 4.0):
+            self.send_depth(telemetry_client, depth)
+        history = telemetry_client.get_history(bp.DepthTel)
+        assert [msg.depth.value for _, msg in history] == [3.0, 4.0]
+
+        telemetry_client.disable_history(bp.DepthTel)
+        with pytest.raises(KeyError):
+            telemetry_client.get_history(bp.DepthTel)
+
+    def test_history_within_time_window(self, mocker, telemetry_client):
+        mocked_time = mocker.patch("blueye.sdk.connection.time.time")
+        telemetry_client.enable_history(bp.DepthTel, max_messages=10)
+        for timestamp, depth in ((100.0, 1.0), (105.0, 2.0), (108.0, 3.0)):
+            mocked_time.return_value = timestamp
+            self.send_depth(telemetry_client, depth)
+        mocked_time.return_value = 110.0
+        history = telemetry_client.get_history(bp.DepthTel, seconds=5)
+        assert history.timestamps == [105.0, 108.0]
+        assert history[-1][1].depth.value == 3.0
+
+    def test_messages_are_decoded_lazily(self, mocker, telemetry_client):
+        telemetry_client.enable_history(bp.DepthTel, max_messages=10)
+        for depth in (1.0, 2.0, 3.0):
+            self.send_depth(telemetry_client, depth)
+        spy = mocker.spy(bp.DepthTel, "deserialize")
+        history = telemetry_client.get_history(bp.DepthTel)
+        assert len(history) == 3
+        assert spy.call_count == 0
+        assert history[0][1] is history[0][1]
+        assert spy.call_count == 1
+        assert len(history[1:]) == 2
+
+    def test_history_raw_pb(self, telemetry_client):
+        telemetry_client.enable_history(bp.DepthTel, max_messages=10)
+        self.send_depth(telemetry_client, 1.0)
+        _, msg = telemetry_client.get_history(bp.DepthTel, raw_pb=True)[0]
+        assert isinstance(msg, bp.DepthTel.pb())
+        assert msg.depth.value == 1.0
@@ -1,4 +1,5 @@
 import blueye.protocol as bp
+import pytest
 from google.protobuf.any_pb2 import Any
 
 import blueye.sdk
@@ -24,3 +25,93 @@ def test_deserialize_any_to_message():
     expected_message = blueye.sdk.utils.deserialize_any_to_message(any_message)
     assert expected_message[0] == bp.DepthTel
     assert expected_message[1] == message
+
+
+def test_deserialize_any_to_wrapper_message():
+    from google.protobuf.wrappers_pb2 import FloatValue
+
+    any_message = Any(
+        type_url="type.googleapis.com/google.protobuf.FloatValue",
+        value=FloatValue(value=2.5).SerializeToString(),
+    )
+
+    payload_type, payload = blueye.sdk.utils.deserialize_any_to_message(any_message)
+
+    assert payload_type is FloatValue
+    assert payload.value == 2.5
+
+
+def test_unknown_type_url_is_cached(mocker):
+    type_url = "type.googleapis.com/blueye.protocol.NotAMessage"
+    with pytest.raises(AttributeError):
+        blueye.sdk.utils.message_type_from_type_url(type_url)
+    resolve = mocker.spy(blueye.sdk.utils, "_resolve_type_url")
+
+    with pytest.raises(AttributeError):
+        blueye.sdk.utils.deserialize_any_to_message(Any(type_url=type_url))
+
+    resolve.assert_not_called()
+
+
+def test_type_url_table_covers_protocol_messages():
+    assert blueye.sdk.utils.message_type_from_type_url(
+        "type.googleapis.com/blueye.protocol.Imu1Tel"
+    ) == (bp.Imu1Tel, True)
+
+
+def test_scalar_field_accessors_flatten_nested_fields():
+    message = bp.RecordStateTel(
+        record_state={"main_is_recording": True, "main_seconds": 12, "main_fps": 30.0}
+    )
+    descriptor = blueye.sdk.utils.message_descriptor(bp.RecordStateTel)
+
+    accessors = blueye.sdk.utils.scalar_field_accessors(descriptor)
+    values = {name: (typecode, getter(message._pb)) for name, typecode, getter in accessors}
+
+    assert values["record_state.main_is_recording"] == ("b", True)
+    assert values["record_state.main_seconds"] == ("q", 12)
+    assert values["record_state.main_fps"] == ("d", 30.0)
+
+
+def test_scalar_field_accessors_convert_timestamps_to_seconds():
+    message = bp.BinlogRecord(unix_timestamp={"seconds": 10, "nanos": 500_000_000})
+    descriptor = blueye.sdk.utils.message_descriptor(bp.BinlogRecord)
+
+    accessors = {
+        name: getter for name, _, getter in blueye.sdk.utils.scalar_field_accessors(descriptor)
+    }
+
+    assert accessors["unix_timestamp"](message._pb) == 10.5
+
+
+def test_frozen_message_reads_fields():
+    message = bp.DepthTel(depth={"value": 1.0})
+    frozen = blueye.sdk.utils.FrozenMessage(message)
+    assert frozen.depth.value == 1.0
+    assert frozen == message
+
+
+@pytest.mark.parametrize("field", ["depth", "unknown"])
+def test_frozen_message_rejects_assignment(field):
+    frozen = blueye.sdk.utils.FrozenMessage(bp.DepthTel(depth={"value": 1.0}))
+    with pytest.raises(AttributeError):
+        setattr(frozen, field, None)
+
+
+def test_frozen_message_freezes_nested_messages_and_repeated_fields():
+    message = bp.ConnectedClientsTel(connected_clients=[{"client_id": 1}, {"client_id": 2}])
+    frozen = blueye.sdk.utils.FrozenMessage(message)
+    assert isinstance(frozen.connected_clients, tuple)
+    assert frozen.connected_clients[1].client_id == 2
+    with pytest.raises(AttributeError):
+        frozen.connected_clients[0].client_id = 3
+
+
+def test_fields_getter_reads_nested_fields_in_order():
+    imu_tel = bp.Imu1Tel(imu={"accelerometer": {"x": 1}, "gyroscope": {"z": 2}, "temperature": 3})
+    getter = blueye.sdk.utils.fields_getter(
+        ["imu.temperature", "imu.accelerometer.x", "imu.gyroscope.z"]
+    )
+    assert getter(imu_tel._pb) == (3, 1, 2)
+    assert blueye.sdk.utils.fields_getter(["imu.gyroscope.z"])(imu_tel._pb) == (2,)
+    assert blueye.sdk.utils.fields_getter([])(imu_tel._pb) == ()